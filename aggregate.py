@@ -0,0 +1,286 @@
+import heapq
+import multiprocessing
+import zlib
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from trading_calendar import last_sessions_start
+
+# Spans are trading sessions, so a window always holds the same number of
+# sessions however many holidays fall inside it.
+TIMEFRAMES = [
+    ("1w", 5),
+    ("2w", 10),
+    ("3w", 15),
+    ("1m", 21),
+    ("3m", 63),
+    ("6m", 126),
+    ("ytd", "ytd"),
+    ("1y", 252),
+    ("all", None),
+]
+
+
+def parse_day(value, cache):
+    if value in cache:
+        return cache[value]
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").date().toordinal()
+    except (TypeError, ValueError):
+        day = None
+    cache[value] = day
+    return day
+
+
+def format_day(day):
+    return date.fromordinal(day).isoformat() if day is not None else "N/A"
+
+
+def bucket_rows(rows, name_field, count_field=None, days=None, start=0):
+    # {day ordinal (None when missing/invalid): {name: [count, first row index]}}
+    if days is None:
+        days = {}
+    cache = {}
+    index = start - 1
+    for index, row in enumerate(rows, start):
+        count = int(row.get(count_field, 0)) if count_field else 1
+        name = row.get(name_field)
+        if not name:
+            continue
+        day = parse_day(row.get("date"), cache)
+        names = days.get(day)
+        if names is None:
+            names = days[day] = {}
+        entry = names.get(name)
+        if entry is None:
+            names[name] = [count, index]
+        else:
+            entry[0] += count
+    return days, index + 1
+
+
+def window_starts(today):
+    starts = []
+    for key, span in TIMEFRAMES:
+        if span is None:
+            continue
+        if span == "ytd":
+            start = date(today.year, 1, 1)
+        else:
+            start = last_sessions_start(today, span)
+        starts.append((key, start.toordinal()))
+    # Every window ends today, so sorting by start nests them narrowest first.
+    return sorted(starts, key=lambda item: item[1], reverse=True)
+
+
+def outer_bound(today):
+    # Start of the widest bounded window; days before it only count in "all".
+    return min(start for _, start in window_starts(today))
+
+
+def add_day(slot, count, first, day):
+    # Folds one day's [count, first row index] into a [count, first, last
+    # day] slot.
+    slot[0] += count
+    slot[1] = min(slot[1], first)
+    if day is not None and (slot[2] is None or day > slot[2]):
+        slot[2] = day
+
+
+def update_outer(days, today, outer=None):
+    # {"through": day, "names": {name: [count, first, last day]}}: totals of
+    # the undated days and the days before every bounded window. Windows only
+    # move forward, so days only ever cross into these totals; the previous
+    # build's `outer` is carried over and just the days that fell out of the
+    # widest window since are added. Count, first row and last day only grow,
+    # which is why the totals are kept here rather than per window, where a
+    # departing day's last-seen date could not be subtracted.
+    through = outer_bound(today)
+    if outer is None or outer["through"] > through:
+        names = {}
+        crossing = [day for day in days if day is None or day < through]
+    else:
+        names = outer["names"]
+        crossing = [day for day in days if day is not None and outer["through"] <= day < through]
+    for day in crossing:
+        for name, (count, first) in days[day].items():
+            slot = names.get(name)
+            if slot is None:
+                names[name] = [count, first, day]
+            else:
+                add_day(slot, count, first, day)
+    return {"through": through, "names": names}
+
+
+def recent_days(days, outer=None):
+    # The buckets still folded day by day: all of them, or with `outer`
+    # totals only the days from its bound on.
+    if outer is None:
+        return days
+    return {day: days[day] for day in days if day is not None and day >= outer["through"]}
+
+
+def window_entries(days, today, outer=None):
+    # {key: [(name, count, first row index, last day)]} in ranking order.
+    # With `outer` (update_outer) only the days it doesn't cover are read.
+    bounds = window_starts(today)
+    keys = [key for key, _ in bounds] + ["all"]
+    negated = [-start for _, start in bounds]
+    last_day = today.toordinal()
+    tiers = len(keys)
+
+    # Each day lands in exactly one tier: the narrowest window that still
+    # contains it. A window is then the prefix sum of tiers up to its own.
+    totals = {}
+    for day, names in recent_days(days, outer).items():
+        if day is None or day > last_day:
+            tier = tiers - 1
+        else:
+            tier = bisect_left(negated, -day)
+        for name, (count, first) in names.items():
+            slots = totals.get(name)
+            if slots is None:
+                slots = totals[name] = [None] * tiers
+            slot = slots[tier]
+            if slot is None:
+                slots[tier] = [count, first, day]
+            else:
+                add_day(slot, count, first, day)
+    # Outer days all sit in the "all" tier.
+    for name, (count, first, last) in (outer["names"].items() if outer else ()):
+        slots = totals.get(name)
+        if slots is None:
+            slots = totals[name] = [None] * tiers
+        slot = slots[tiers - 1]
+        if slot is None:
+            slots[tiers - 1] = [count, first, last]
+        else:
+            add_day(slot, count, first, last)
+
+    windows = {key: [] for key in keys}
+    for name, slots in totals.items():
+        count = 0
+        first = None
+        last = None
+        for key, slot in zip(keys, slots):
+            if slot is not None:
+                count += slot[0]
+                first = slot[1] if first is None else min(first, slot[1])
+                if slot[2] is not None and (last is None or slot[2] > last):
+                    last = slot[2]
+            if first is not None:
+                windows[key].append((name, count, first, last))
+
+    return {key: sorted(windows[key], key=rank_key) for key, _ in TIMEFRAMES}
+
+
+def rank_key(entry):
+    return -entry[1], entry[2]
+
+
+def select_part(days, part, parts):
+    # The day buckets of the names whose stable hash falls in `part`; every
+    # name's counts live in exactly one part.
+    selected = {}
+    owner = {}
+    for day, names in days.items():
+        bucket = None
+        for name, entry in names.items():
+            index = owner.get(name)
+            if index is None:
+                index = owner[name] = zlib.crc32(name.encode("utf-8")) % parts
+            if index != part:
+                continue
+            if bucket is None:
+                bucket = selected[day] = {}
+            bucket[name] = entry
+    return selected
+
+
+def select_outer(outer, part, parts):
+    if outer is None:
+        return None
+    names = {name: slot for name, slot in outer["names"].items() if zlib.crc32(name.encode("utf-8")) % parts == part}
+    return {"through": outer["through"], "names": names}
+
+
+# Set before forking workers so they inherit the day buckets instead of
+# receiving a pickled copy.
+shared_days = {}
+shared_outer = {}
+
+
+def part_entries(part, parts, today):
+    outer = select_outer(shared_outer or None, part, parts)
+    return window_entries(select_part(shared_days, part, parts), today, outer)
+
+
+def partial_windows(days, today, workers, outer=None):
+    if "fork" in multiprocessing.get_all_start_methods():
+        shared_days.clear()
+        shared_days.update(recent_days(days, outer))
+        shared_outer.clear()
+        shared_outer.update(outer or {})
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                return list(pool.map(part_entries, range(workers), [workers] * workers, [today] * workers))
+        finally:
+            shared_days.clear()
+            shared_outer.clear()
+    recent = recent_days(days, outer)
+    parts = [select_part(recent, part, workers) for part in range(workers)]
+    outers = [select_outer(outer, part, workers) for part in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(window_entries, parts, [today] * workers, outers))
+
+
+def aggregate_windows(days, today, workers=1, outer=None):
+    # {key: [(name, count, first row index, last day)]}. With workers > 1
+    # each process ranks a hash partition of the names and the sorted
+    # partials are merged on the same key. First row indexes are unique per
+    # name, so the order is identical to the serial build.
+    if workers > 1 and len(days) > 1:
+        partials = partial_windows(days, today, workers, outer)
+        return {
+            key: list(heapq.merge(*(partial[key] for partial in partials), key=rank_key))
+            for key, _ in TIMEFRAMES
+        }
+    return window_entries(days, today, outer)
+
+
+def stock_entries(windows, industry_of=None):
+    # `industry_of` is the {stock: industry} mapping joined onto each entry.
+    industry_of = industry_of or {}
+    result = {}
+    for key, entries in windows.items():
+        result[key] = [
+            {
+                "stock": name,
+                "count": count,
+                "first": first,
+                "industry": industry_of.get(name, "N/A"),
+                "last_seen": format_day(last),
+            }
+            for name, count, first, last in entries
+        ]
+    return result
+
+
+def industry_entries(windows):
+    return {key: [(name, count, first) for name, count, first, _ in entries] for key, entries in windows.items()}
+
+
+def stock_windows(days, today, industry_of=None, workers=1, outer=None):
+    return stock_entries(aggregate_windows(days, today, workers, outer), industry_of)
+
+
+def industry_windows(days, today, workers=1, outer=None):
+    return industry_entries(aggregate_windows(days, today, workers, outer))
+
+
+def day_range(days):
+    valid = [day for day in days if day is not None]
+    if not valid:
+        return None, None
+    return format_day(min(valid)), format_day(max(valid))
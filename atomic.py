@@ -0,0 +1,41 @@
+import os
+from contextlib import contextmanager
+
+
+def sync_directory(directory):
+    # Makes a rename inside `directory` durable; Windows has no directory
+    # handles to sync.
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode="wb", **kwargs):
+    # Every file the project rewrites goes through here. The block writes
+    # path + ".tmp", which is fsynced and renamed over `path` only once the
+    # block finishes, then the directory is synced: after a crash or power
+    # loss `path` holds either the old or the new content in full. If the
+    # block raises, the temp file is removed and `path` is left as it was.
+    tmp_path = path + ".tmp"
+    f = open(tmp_path, mode, **kwargs)
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        os.remove(tmp_path)
+        raise
+    f.close()
+    os.replace(tmp_path, path)
+    sync_directory(os.path.dirname(path) or ".")
+
+
+def write_atomic(path, data):
+    with atomic_write(path) as f:
+        f.write(data)
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from itertools import accumulate
+
+import generate_dashboard as dashboard
+from aggregate import day_range, industry_windows, stock_windows
+from columnar import bucket_tables
+from trading_calendar import is_trading_day
+
+PRESETS = {
+    "realistic": [(1, 50), (5, 50), (20, 50)],
+    "stressed": [(1, 500), (5, 500), (20, 500)],
+}
+PRESETS["all"] = PRESETS["realistic"] + PRESETS["stressed"]
+UNIVERSE = 5000
+INDUSTRIES = 150
+
+
+def trading_days(years, end):
+    day = end - timedelta(days=round(years * 365.25))
+    days = []
+    while day <= end:
+        if is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def write_dataset(directory, years, per_day, end, seed=0):
+    # Skewed stock popularity so "all" sees both repeat gainers and a long tail.
+    rng = random.Random(seed)
+    stocks = [f"Stock {i:05d}" for i in range(UNIVERSE)]
+    cum_weights = list(accumulate(1.0 / (i + 1) ** 0.8 for i in range(UNIVERSE)))
+    industry_of = {stock: f"Industry {rng.randrange(INDUSTRIES):03d}" for stock in stocks}
+
+    data_dir = os.path.join(directory, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    rows = 0
+    with open(os.path.join(data_dir, "stocks_data.csv"), "w", newline="", encoding="utf-8") as sf, \
+            open(os.path.join(data_dir, "industry_data.csv"), "w", newline="", encoding="utf-8") as inf:
+        stock_writer = csv.writer(sf)
+        industry_writer = csv.writer(inf)
+        stock_writer.writerow(["date", "stock"])
+        industry_writer.writerow(["date", "industry", "count"])
+        for day in trading_days(years, end):
+            iso = day.isoformat()
+            count = max(1, int(rng.gauss(per_day, per_day / 4)))
+            picked = set(rng.choices(stocks, cum_weights=cum_weights, k=count))
+            industries = {}
+            for stock in picked:
+                stock_writer.writerow([iso, stock])
+                industries[industry_of[stock]] = industries.get(industry_of[stock], 0) + 1
+            for industry, total in industries.items():
+                industry_writer.writerow([iso, industry, total])
+            rows += len(picked)
+    return rows
+
+
+def append_session(directory, day, per_day, seed):
+    # One more scrape's worth of rows dated `day`, appended the way the daily
+    # job does: the delta an incremental build has to fold in.
+    rng = random.Random(seed)
+    picked = rng.sample(range(UNIVERSE), min(per_day, UNIVERSE))
+    data_dir = os.path.join(directory, "data")
+    with open(os.path.join(data_dir, "stocks_data.csv"), "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([day.isoformat(), f"Stock {i:05d}"] for i in picked)
+    with open(os.path.join(data_dir, "industry_data.csv"), "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows([day.isoformat(), f"Industry {i % INDUSTRIES:03d}", 1] for i in picked)
+
+
+def measure(func, repeat=1, memory=True):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    if not memory:
+        return result, {"seconds": round(best, 4), "peak_bytes": None}
+    # Separate traced run: tracemalloc slows the code down too much to time it.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": round(best, 4), "peak_bytes": peak}
+
+
+def clear_build_state(names=("aggregate_state.json", "aggregate_state", "build_cache.json", "columns", "column_store")):
+    for name in names:
+        path = os.path.join("data", name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def run_case(years, per_day, repeat, end, memory=True, workers=1):
+    workdir = tempfile.mkdtemp(prefix="tg-bench-")
+    cwd = os.getcwd()
+    try:
+        rows = write_dataset(workdir, years, per_day, end)
+        os.chdir(workdir)
+        results = {}
+        # The row-dict helpers are the original CSV path, kept as the baseline.
+        stocks, results["load_stocks_rows"] = measure(lambda: list(dashboard.iter_rows(dashboard.STOCKS_FILE)), repeat, memory)
+        industries, results["load_industry_rows"] = measure(lambda: list(dashboard.iter_rows(dashboard.INDUSTRY_FILE)), repeat, memory)
+        stock_tables, results["load_stocks_data"] = measure(dashboard.load_stocks_data, repeat, memory)
+        industry_tables, results["load_industry_data"] = measure(dashboard.load_industry_data, repeat, memory)
+        _, results["filter_by_timeframe"] = measure(lambda: dashboard.filter_by_timeframe(stocks, days=30), repeat, memory)
+        _, results["get_stock_counts"] = measure(lambda: dashboard.get_stock_counts(stocks), repeat, memory)
+        _, results["get_industry_totals"] = measure(lambda: dashboard.get_industry_totals(industries), repeat, memory)
+
+        stock_days, _ = bucket_tables(stock_tables)
+        industry_days, _ = bucket_tables(industry_tables)
+        stocks_json = stock_windows(stock_days, end)
+        industries_json = industry_windows(industry_days, end)
+        _, results["build_shards"] = measure(
+            lambda: dashboard.build_shards(stocks_json, industries_json, day_range(stock_days)[0], stock_days, industry_days), repeat, memory
+        )
+        _, results["generate_html"] = measure(
+            lambda: dashboard.generate_html("bench", None, None, rows), repeat, memory
+        )
+
+        def cold_build():
+            clear_build_state()
+            return dashboard.generate_dashboard(full_rebuild=True, workers=workers)
+
+        _, results["generate_dashboard_full"] = measure(cold_build, repeat, memory)
+        appended = [0]
+
+        def incremental_build():
+            appended[0] += 1
+            append_session(".", end, per_day, appended[0])
+            return dashboard.generate_dashboard(workers=workers)
+
+        _, results["generate_dashboard_incremental"] = measure(incremental_build, repeat, memory)
+        _, results["generate_dashboard_noop"] = measure(lambda: dashboard.generate_dashboard(workers=workers), repeat, memory)
+        return {"years": years, "per_day": per_day, "rows": rows, "results": results}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(report, baseline):
+    previous = {(case["years"], case["per_day"]): case for case in baseline.get("cases", [])}
+    for case in report["cases"]:
+        old = previous.get((case["years"], case["per_day"]))
+        if not old:
+            continue
+        print(f"{case['years']}y x {case['per_day']}/day vs baseline:")
+        for name, result in case["results"].items():
+            before = old["results"].get(name)
+            if not before or not before["seconds"]:
+                continue
+            ratio = result["seconds"] / before["seconds"]
+            print(f"  {name:32s} {before['seconds']:9.4f}s -> {result['seconds']:9.4f}s  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_dashboard.py on synthetic history")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="realistic")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per step; the fastest is kept")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory runs")
+    parser.add_argument("--compare", help="earlier results file to print speedups against")
+    parser.add_argument("--workers", type=int, default=1, help="aggregation processes for the generate_dashboard runs")
+    args = parser.parse_args()
+
+    end = date.today()
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "preset": args.preset,
+        "workers": args.workers,
+        "cases": [],
+    }
+    for years, per_day in PRESETS[args.preset]:
+        case = run_case(years, per_day, args.repeat, end, memory=not args.no_memory, workers=args.workers)
+        report["cases"].append(case)
+        print(f"{years}y x {per_day}/day ({case['rows']} rows)")
+        for name, result in case["results"].items():
+            peak = f"  peak {result['peak_bytes'] / 1e6:8.1f} MB" if result["peak_bytes"] is not None else ""
+            print(f"  {name:32s} {result['seconds']:9.4f}s{peak}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+
+from atomic import atomic_write
+
+CACHE_FILE = os.path.join("data", "build_cache.json")
+CACHE_VERSION = 1
+CHUNK = 1 << 20
+
+
+def file_digest(path):
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def build_key(inputs, sources, settings):
+    # Everything the rendered output depends on: input file contents, the
+    # generator's own source (template included) and settings such as the
+    # build date that windows are relative to.
+    payload = {
+        "inputs": {path: file_digest(path) for path in inputs},
+        "sources": {os.path.basename(path): file_digest(path) for path in sources},
+        "settings": settings,
+    }
+    return bytes_digest(json.dumps(payload, sort_keys=True).encode("utf-8"))
+
+
+def load_cache(path=CACHE_FILE):
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(dict(cache, version=CACHE_VERSION), f, indent=1, sort_keys=True)
+
+
+def outputs_current(cache, key):
+    # True when the last build had this key and its files are still on disk
+    # exactly as written.
+    outputs = cache.get("outputs")
+    if cache.get("key") != key or not outputs:
+        return False
+    return all(file_digest(path) == digest for path, digest in outputs.items())
+
+
+def unchanged(cache, paths, source_digest, name):
+    # True when `name` was last built from the same source bytes and all of
+    # its files are still on disk as written then.
+    if cache.get("sources", {}).get(name) != source_digest:
+        return False
+    outputs = cache.get("outputs", {})
+    return all(path in outputs and file_digest(path) == outputs[path] for path in paths)
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+
+from atomic import atomic_write
+
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "top-gainers-checkpoints")
+
+
+def checkpoint_path(screen, day):
+    return os.path.join(CHECKPOINT_DIR, f"{screen['name']}-{day}.json")
+
+
+def new_state(screen):
+    # Pages are keyed by page number as a string (JSON object keys).
+    return {"url": screen["url"], "pages": {}, "page_count": None, "result_count": None, "labels": None}
+
+
+def load_checkpoint(screen, day):
+    path = checkpoint_path(screen, day)
+    if not os.path.isfile(path):
+        return new_state(screen)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return new_state(screen)
+    if state.get("url") != screen["url"]:
+        return new_state(screen)
+    return state
+
+
+def save_checkpoint(screen, day, state):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    with atomic_write(checkpoint_path(screen, day), "w", encoding="utf-8") as f:
+        json.dump(state, f, separators=(",", ":"))
+
+
+def clear_checkpoint(screen, day):
+    path = checkpoint_path(screen, day)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def missing_pages(state):
+    if not state["page_count"]:
+        return None
+    return [number for number in range(1, state["page_count"] + 1) if str(number) not in state["pages"]]
+
+
+def is_complete(state):
+    return missing_pages(state) == [] and state["labels"] is not None
+
+
+def ordered_tables(state):
+    return [state["pages"][str(number)] for number in range(1, (state["page_count"] or 0) + 1) if str(number) in state["pages"]]
@@ -0,0 +1,451 @@
+import argparse
+import csv
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+from datetime import date
+
+from aggregate import parse_day
+from atomic import atomic_write
+from snapshot import csv_signature, stream_lines
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NO_DAY = 0
+NO_NAME = -1
+NO_VALUE = float("nan")
+
+# Month partitions: magic, rows, first source row (-1 when the rows are not
+# contiguous and a positions column follows), min day, max day, has counts,
+# compressed, number of float64 columns. The header is padded to a multiple
+# of 4 so the int32 columns of an uncompressed partition can be mapped in
+# place; the float64 columns after them start on a multiple of 8.
+PARTITION_MAGIC = b"TGPART03"
+PARTITION_HEADER = struct.Struct("<8sIiiiBBBx")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 3
+UNDATED = "undated"
+
+# `positions` holds each row's index in the source CSV when the table is not
+# simply rows 0..n-1 (partition reads); bucket_columns uses it for first-seen.
+# `extras` maps each extra CSV field (the screen's price/change/market cap
+# columns) to a float64 column, NaN where a row has no value.
+ColumnTable = namedtuple(
+    "ColumnTable", ["dates", "names", "counts", "labels", "rows", "positions", "extras"], defaults=(None, None)
+)
+
+
+def table_positions(table):
+    return table.positions if table.positions is not None else range(table.rows)
+
+
+def format_number(value):
+    if value != value:
+        return ""
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def export_csv(tables, f, name_field, count_field=None, header=True):
+    # Writes one dataset's partition tables back out as CSV in source row
+    # order. Each table is already in that order, so they are merged. Extra
+    # columns come back as numbers (12.50 is written as 12.5).
+    writer = csv.writer(f)
+    extra_fields = list(tables[0].extras or {}) if tables else []
+    if header:
+        writer.writerow(["date", name_field] + ([count_field] if count_field else []) + extra_fields)
+    rows = heapq.merge(*(
+        zip(table_positions(table), range(table.rows), [table] * table.rows) for table in tables
+    ))
+    for _, index, table in rows:
+        day = table.dates[index]
+        name_id = table.names[index]
+        row = [
+            date.fromordinal(day).isoformat() if day != NO_DAY else "",
+            table.labels[name_id] if name_id != NO_NAME else "",
+        ]
+        if count_field:
+            row.append(table.counts[index])
+        for field in extra_fields:
+            row.append(format_number(table.extras[field][index]))
+        writer.writerow(row)
+
+
+def bucket_columns(table, days=None):
+    # Same shape as aggregate.bucket_rows, built from the integer columns.
+    if days is None:
+        days = {}
+    if np is not None and isinstance(table.dates, np.ndarray):
+        return bucket_columns_numpy(table, days)
+
+    labels = table.labels
+    counts = table.counts if table.counts is not None else [1] * table.rows
+    positions = table_positions(table)
+    for index, day, name_id, count in zip(positions, table.dates, table.names, counts):
+        if name_id == NO_NAME:
+            continue
+        names = days.setdefault(day if day != NO_DAY else None, {})
+        name = labels[name_id]
+        entry = names.get(name)
+        if entry is None:
+            names[name] = [count, index]
+        else:
+            entry[0] += count
+    return days, table.rows
+
+
+def bucket_columns_numpy(table, days):
+    dates = table.dates.astype(np.int64)
+    names = table.names.astype(np.int64)
+    keep = names != NO_NAME
+    positions = table.positions[keep] if table.positions is not None else np.nonzero(keep)[0]
+    keys = dates[keep] * (len(table.labels) + 1) + names[keep]
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    if table.counts is not None:
+        totals = np.bincount(inverse, weights=table.counts[keep], minlength=len(unique))
+    else:
+        totals = np.bincount(inverse, minlength=len(unique))
+
+    labels = table.labels
+    width = len(labels) + 1
+    for key, count, index in zip(unique.tolist(), totals.astype(np.int64).tolist(), positions[first].tolist()):
+        day, name_id = divmod(key, width)
+        names = days.setdefault(day if day != NO_DAY else None, {})
+        entry = names.get(labels[name_id])
+        if entry is None:
+            names[labels[name_id]] = [count, index]
+        else:
+            entry[0] += count
+            entry[1] = min(entry[1], index)
+    return days, table.rows
+
+
+def bucket_tables(tables, days=None):
+    # bucket_columns over every partition read_partitions returned; a day
+    # never spans two partitions, so first-seen positions stay exact.
+    if days is None:
+        days = {}
+    rows = 0
+    for table in tables:
+        days, count = bucket_columns(table, days)
+        rows += count
+    return days, rows
+
+
+def partition_key(day):
+    if day == NO_DAY:
+        return UNDATED
+    value = date.fromordinal(day)
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def partition_path(directory, key):
+    return os.path.join(directory, f"{key}.col")
+
+
+def float_padding(offset):
+    return -offset % 8
+
+
+def write_partition(path, dates, names, counts, positions, compress=False, extras=()):
+    # Positions only ever increase within a partition, so the rows are
+    # contiguous exactly when the first and last are rows - 1 apart.
+    # `extras` are float64 columns stored after the int32 ones.
+    rows = len(dates)
+    contiguous = rows and positions[-1] - positions[0] == rows - 1
+    payload = array("i", dates).tobytes() + array("i", names).tobytes()
+    if counts is not None:
+        payload += array("i", counts).tobytes()
+    if not contiguous:
+        payload += array("i", positions).tobytes()
+    if extras:
+        payload += bytes(float_padding(len(payload) + (0 if compress else PARTITION_HEADER.size)))
+        for column in extras:
+            payload += array("d", column).tobytes()
+    with atomic_write(path) as f:
+        f.write(PARTITION_HEADER.pack(
+            PARTITION_MAGIC,
+            rows,
+            positions[0] if contiguous and rows else -1,
+            min(dates, default=NO_DAY),
+            max(dates, default=NO_DAY),
+            counts is not None,
+            compress,
+            len(extras),
+        ))
+        f.write(zlib.compress(payload, 6) if compress else payload)
+
+
+def read_partition(path, use_numpy=False):
+    # (dates, names, counts or None, positions, [extras]) int32 columns plus
+    # the float64 extra columns. For an
+    # uncompressed partition they are memoryview (or NumPy) views straight
+    # into the mapped file, and nothing is copied until a caller iterates
+    # them; a compressed one is inflated first. Contiguous positions come
+    # back as a range (an arange under NumPy).
+    with open(path, "rb") as f:
+        header = f.read(PARTITION_HEADER.size)
+        if len(header) < PARTITION_HEADER.size:
+            raise ValueError(f"Not a partition file: {path}")
+        magic, rows, first, _, _, has_counts, compressed, floats = PARTITION_HEADER.unpack(header)
+        if magic != PARTITION_MAGIC:
+            raise ValueError(f"Not a partition file: {path}")
+        if compressed:
+            buffer, offset = zlib.decompress(f.read()), 0
+        elif rows:
+            buffer, offset = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), PARTITION_HEADER.size
+        else:
+            buffer, offset = b"", 0
+
+    def column(start, kind, size):
+        if use_numpy:
+            return np.frombuffer(buffer, dtype=np.dtype(kind), count=rows, offset=start)
+        return memoryview(buffer)[start:start + rows * size].cast(kind)
+
+    ints = 2 + bool(has_counts) + (first < 0)
+    dates, names = column(offset, "i", 4), column(offset + rows * 4, "i", 4)
+    counts = column(offset + 2 * rows * 4, "i", 4) if has_counts else None
+    if first < 0:
+        positions = column(offset + (ints - 1) * rows * 4, "i", 4)
+    else:
+        positions = np.arange(first, first + rows, dtype=np.int64) if use_numpy else range(first, first + rows)
+    start = offset + ints * rows * 4 if rows else 0
+    start += float_padding(start)
+    extras = [column(start + index * rows * 8, "d", 8) for index in range(floats)]
+    return dates, names, counts, positions, extras
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(directory, manifest):
+    with atomic_write(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NO_VALUE
+
+
+def export_partitions(csv_path, directory, name_field, count_field=None, full=False, compress=False, extra_fields=()):
+    # Mirrors `csv_path` as one column file per month plus manifest.json (the
+    # shared name dictionary, per-partition row counts and day bounds).
+    # `extra_fields` are stored as float64 columns, NaN for rows without a
+    # value (those written before the CSV gained the column included). Like
+    # the aggregate snapshot, only rows appended since the last export are
+    # read, and only the months they fall in are rewritten; a rewritten CSV
+    # (or `full`) is exported from scratch. Uncompressed partitions are the
+    # memory-mapped store the dashboard loads from; `compress` zlib-packs
+    # them for the published export. Returns the months written.
+    if not os.path.isfile(csv_path):
+        return []
+    manifest = None if full else load_manifest(directory)
+    if manifest and (
+        manifest["name_field"] != name_field
+        or manifest["count_field"] != count_field
+        or manifest["compressed"] != compress
+        or manifest["extra_fields"] != list(extra_fields)
+        or manifest["offset"] > os.path.getsize(csv_path)
+        or manifest["signature"] != csv_signature(csv_path, manifest["offset"])
+    ):
+        manifest = None
+    if manifest is None:
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".col"):
+                    os.remove(os.path.join(directory, name))
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "name_field": name_field,
+            "count_field": count_field,
+            "compressed": compress,
+            "extra_fields": list(extra_fields),
+            "fields": None,
+            "offset": 0,
+            "rows": 0,
+            "labels": [],
+            "partitions": {},
+        }
+
+    labels = manifest["labels"]
+    ids = {name: index for index, name in enumerate(labels)}
+    added = {}
+    by_date = {}
+    cache = {}
+    consumed = [0]
+    position = manifest["rows"]
+    with open(csv_path, "rb") as f:
+        f.seek(manifest["offset"])
+        reader = csv.reader(stream_lines(f, consumed))
+        fields = manifest["fields"] or next(reader, [])
+        index_of = {field: index for index, field in enumerate(fields)}
+        date_at = index_of.get("date", len(fields))
+        name_at = index_of.get(name_field, len(fields))
+        count_at = index_of.get(count_field, len(fields))
+        extra_at = [index_of.get(field, len(fields)) for field in extra_fields]
+        for row in reader:
+            if not row:
+                continue
+            value = row[date_at] if date_at < len(row) else None
+            slot = by_date.get(value)
+            if slot is None:
+                day = parse_day(value, cache)
+                day = NO_DAY if day is None else day
+                columns = added.setdefault(
+                    partition_key(day), (array("i"), array("i"), array("i"), array("i"), [array("d") for _ in extra_fields])
+                )
+                slot = by_date[value] = (day, columns)
+            day, columns = slot
+            name = row[name_at] if name_at < len(row) else None
+            if name:
+                name_id = ids.get(name)
+                if name_id is None:
+                    name_id = ids[name] = len(labels)
+                    labels.append(name)
+            else:
+                name_id = NO_NAME
+            columns[0].append(day)
+            columns[1].append(name_id)
+            columns[2].append(int(row[count_at] or 0) if count_field and count_at < len(row) else 0)
+            columns[3].append(position)
+            for column, at in zip(columns[4], extra_at):
+                column.append(number(row[at]) if at < len(row) else NO_VALUE)
+            position += 1
+    manifest["fields"] = fields
+
+    os.makedirs(directory, exist_ok=True)
+    for key, (dates, names, counts, positions, extras) in sorted(added.items()):
+        path = partition_path(directory, key)
+        if key in manifest["partitions"] and os.path.isfile(path):
+            old_dates, old_names, old_counts, old_positions, old_extras = read_partition(path)
+            dates, names, positions = array("i", old_dates) + dates, array("i", old_names) + names, array("i", old_positions) + positions
+            counts = array("i", old_counts) + counts if count_field else None
+            extras = [array("d", old) + new for old, new in zip(old_extras, extras)]
+        elif not count_field:
+            counts = None
+        write_partition(path, dates, names, counts, positions, compress, extras)
+        manifest["partitions"][key] = {"rows": len(dates), "min_day": min(dates, default=NO_DAY), "max_day": max(dates, default=NO_DAY)}
+    manifest["offset"] += consumed[0]
+    manifest["rows"] = position
+    manifest["signature"] = csv_signature(csv_path, manifest["offset"])
+    save_manifest(directory, manifest)
+    return sorted(added)
+
+
+def select(column, keep, use_numpy):
+    # Copies the rows at `keep` out of a partition column (a positions range
+    # becomes int32 like the rest).
+    if use_numpy:
+        return column[keep]
+    return array(getattr(column, "format", "i"), (column[i] for i in keep))
+
+
+def read_partitions(directory, start=None, end=None, use_numpy=None):
+    # One ColumnTable per partition holding rows dated within [start, end]
+    # (date objects, either may be None), in month order. Partitions entirely
+    # outside the range are never opened, and whole partitions come back as
+    # zero-copy views (see read_partition); only the boundary months of a
+    # bounded read are filtered into copies. Undated rows only come back for
+    # an unbounded read. Returns None when nothing has been exported to
+    # `directory`.
+    if use_numpy is None:
+        use_numpy = np is not None
+    manifest = load_manifest(directory)
+    if manifest is None:
+        return None
+    low = start.toordinal() if start else None
+    high = end.toordinal() if end else None
+    tables = []
+    for key, info in sorted(manifest["partitions"].items()):
+        if key == UNDATED:
+            if low is not None or high is not None:
+                continue
+        elif (low is not None and info["max_day"] < low) or (high is not None and info["min_day"] > high):
+            continue
+        columns = read_partition(partition_path(directory, key), use_numpy)
+        if (low is not None and info["min_day"] < low) or (high is not None and info["max_day"] > high):
+            keep = [i for i, day in enumerate(columns[0]) if (low is None or day >= low) and (high is None or day <= high)]
+            columns = [select(column, keep, use_numpy) if column is not None else None for column in columns[:4]] + [
+                [select(column, keep, use_numpy) for column in columns[4]]
+            ]
+        dates, names, counts, positions, extras = columns
+        extras = dict(zip(manifest["extra_fields"], extras))
+        tables.append(ColumnTable(dates, names, counts, manifest["labels"], len(dates), positions, extras))
+    return tables
+
+
+def export_screen(screen, directory=None, compress=True):
+    # {dataset: months written} for both of a screen's CSVs; by default the
+    # compressed export in the screen's export_dir.
+    directory = directory or screen["export_dir"]
+    return {
+        "stocks": export_partitions(
+            screen["stocks_file"], os.path.join(directory, "stocks"), "stock",
+            compress=compress, extra_fields=[column for column, _ in screen["columns"]],
+        ),
+        "industries": export_partitions(screen["industry_file"], os.path.join(directory, "industries"), "industry", "count", compress=compress),
+    }
+
+
+def main():
+    from screens import select_screens
+
+    parser = argparse.ArgumentParser(description="Export the CSVs as month-partitioned column files, or read them back")
+    parser.add_argument("--screen", action="append", help="only this registered screen (repeatable; default: all)")
+    parser.add_argument("--dataset", choices=["stocks", "industries"], help="write this dataset's rows as CSV instead of exporting")
+    parser.add_argument("--export-csv", metavar="PATH", help="with --dataset, write the CSV to PATH instead of stdout")
+    parser.add_argument("--since", type=date.fromisoformat, help="first date to read (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="last date to read (YYYY-MM-DD)")
+    args = parser.parse_args()
+    try:
+        screens = select_screens(args.screen)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if not args.dataset:
+        for screen in screens:
+            for dataset, months in export_screen(screen).items():
+                print(f"{screen['name']} {dataset}: {len(months)} partition(s) written")
+        return
+
+    name_field, count_field = ("stock", None) if args.dataset == "stocks" else ("industry", "count")
+    groups = []
+    for screen in screens:
+        tables = read_partitions(os.path.join(screen["export_dir"], args.dataset), args.since, args.until, use_numpy=False)
+        if tables is None:
+            parser.error(f"nothing exported for {screen['name']} yet; run without --dataset first")
+        groups.append(tables)
+    f = open(args.export_csv, "w", encoding="utf-8", newline="") if args.export_csv else sys.stdout
+    try:
+        for index, tables in enumerate(groups):
+            export_csv(tables, f, name_field, count_field, header=index == 0)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import os
+from datetime import date
+
+from atomic import atomic_write, write_atomic
+from snapshot import csv_signature
+from trading_calendar import is_trading_day
+
+INDEX_FILE = os.path.join("data", "date_index.json")
+COPY_CHUNK = 1 << 16
+
+
+def scan_dates(path):
+    # {date string: [[start, end], ...]} byte ranges of each date's rows.
+    dates = {}
+    with open(path, "rb") as f:
+        offset = len(f.readline())
+        for line in f:
+            end = offset + len(line)
+            day = line.split(b",", 1)[0].strip().decode("utf-8")
+            if day:
+                ranges = dates.setdefault(day, [])
+                if ranges and ranges[-1][1] == offset:
+                    ranges[-1][1] = end
+                else:
+                    ranges.append([offset, end])
+            offset = end
+    return dates
+
+
+def load_index(index_path=INDEX_FILE):
+    if not os.path.isfile(index_path):
+        return {}
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index, index_path=INDEX_FILE):
+    with atomic_write(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), sort_keys=True)
+
+
+def date_index(path, index):
+    # Cached per-file date index, rescanned when the file no longer matches it.
+    if not os.path.isfile(path):
+        index.pop(path, None)
+        return {}
+    size = os.path.getsize(path)
+    entry = index.get(path)
+    if entry and entry["size"] == size and entry["signature"] == csv_signature(path, size):
+        return entry["dates"]
+    dates = scan_dates(path)
+    index[path] = {"size": size, "signature": csv_signature(path, size), "dates": dates}
+    return dates
+
+
+def stored_dates(path, index_path=INDEX_FILE):
+    index = load_index(index_path)
+    dates = set(date_index(path, index))
+    save_index(index, index_path)
+    return dates
+
+
+def copy_range(src, dst, start, end):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def encode_rows(rows):
+    buffer = io.StringIO(newline="")
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def write_day(path, header, day, rows, replace=False, index_path=INDEX_FILE):
+    # Stores `rows` as the only copy of `day` in `path`. Returns False when the
+    # date is already stored and `replace` is not set. The new file is built
+    # next to the old one and swapped in with a single rename.
+    index = load_index(index_path)
+    dates = date_index(path, index)
+    existing = dates.get(day, [])
+    if existing and not replace:
+        save_index(index, index_path)
+        return False
+
+    exists = os.path.isfile(path)
+    size = os.path.getsize(path) if exists else 0
+    with atomic_write(path) as dst:
+        if exists:
+            with open(path, "rb") as src:
+                position = 0
+                first_line = src.readline()
+                current = next(csv.reader([first_line.decode("utf-8")]), [])
+                if current != header:
+                    # Older files may predate newly added trailing columns;
+                    # widen their header so the new values stay addressable.
+                    if header[:len(current)] != current:
+                        raise ValueError(f"{path} has header {current}, expected {header}")
+                    dst.write(encode_rows([header]))
+                    position = len(first_line)
+                for start, end in existing:
+                    copy_range(src, dst, position, start)
+                    position = end
+                copy_range(src, dst, position, size)
+                if size:
+                    src.seek(size - 1)
+                    if src.read(1) != b"\n":
+                        dst.write(b"\r\n")
+        else:
+            dst.write(encode_rows([header]))
+        dst.write(encode_rows(rows))
+
+    index.pop(path, None)
+    date_index(path, index)
+    save_index(index, index_path)
+    return True
+
+
+def dedupe_csv(path, key_fields, index_path=INDEX_FILE):
+    # Drops rows dated on non-trading days and repeated (date, *key_fields)
+    # rows, keeping the first occurrence. Returns the number of rows removed.
+    if not os.path.isfile(path):
+        return 0
+    seen = set()
+    kept = []
+    removed = 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        positions = [header.index(field) for field in ["date"] + list(key_fields)]
+        for row in reader:
+            if not row:
+                continue
+            key = tuple(row[i] if i < len(row) else "" for i in positions)
+            try:
+                trading = is_trading_day(date.fromisoformat(key[0]))
+            except ValueError:
+                trading = True
+            if key in seen or not trading:
+                removed += 1
+                continue
+            seen.add(key)
+            kept.append(row)
+    if not removed:
+        return 0
+
+    write_atomic(path, encode_rows([header] + kept))
+
+    index = load_index(index_path)
+    index.pop(path, None)
+    date_index(path, index)
+    save_index(index, index_path)
+    return removed
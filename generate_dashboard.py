@@ -1,42 +1,93 @@
+import argparse
 import csv
+import gzip
+import hashlib
+import json
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import defaultdict
 
+import metrics
+from aggregate import day_range, industry_entries, industry_windows, stock_entries, stock_windows, update_outer
+from atomic import write_atomic
+from build_cache import bytes_digest, build_key, file_digest, load_cache, outputs_current, save_cache, unchanged
+from columnar import bucket_tables, export_partitions, read_partitions
+from industry_map import MAP_FILE, industry_lookup, load_mapping
+from screens import DEFAULT_SCREEN, select_screens
+from snapshot import load_snapshot, save_snapshot, update_days
+from sqlite_store import load_days, open_synced, window_counts
+from streaks import MOMENTUM_SESSIONS, stock_stats, update_states
+from trading_calendar import last_sessions_start, market_today
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 DATA_DIR = "data"
-STOCKS_FILE = os.path.join(DATA_DIR, "stocks_data.csv")
-INDUSTRY_FILE = os.path.join(DATA_DIR, "industry_data.csv")
-DOCS_DIR = "docs"
+STOCKS_FILE = DEFAULT_SCREEN["stocks_file"]
+INDUSTRY_FILE = DEFAULT_SCREEN["industry_file"]
+DOCS_DIR = DEFAULT_SCREEN["docs_dir"]
 OUTPUT_FILE = os.path.join(DOCS_DIR, "index.html")
+SHARDS_DIR = os.path.join(DOCS_DIR, "data")
+SCHEMA_VERSION = 3
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Every module a build imports, directly or not; editing any of them
+# invalidates the build cache.
+GENERATOR_SOURCES = [
+    os.path.join(SOURCE_DIR, name)
+    for name in (
+        "generate_dashboard.py",
+        "aggregate.py",
+        "atomic.py",
+        "build_cache.py",
+        "columnar.py",
+        "http_scrape.py",
+        "industry_map.py",
+        "metrics.py",
+        "retry.py",
+        "screens.py",
+        "snapshot.py",
+        "sqlite_store.py",
+        "streaks.py",
+        "trading_calendar.py",
+    )
+]
+
+
+def iter_rows(path):
+    # One row at a time; callers that only count or fold never hold the file.
+    if not os.path.isfile(path):
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def load_columns(csv_path, store_dir, name_field, count_field=None):
+    # The memory-mapped column store (one partition table per month),
+    # brought up to date with the CSV first.
+    export_partitions(csv_path, store_dir, name_field, count_field)
+    return read_partitions(store_dir) or []
 
 
-def load_stocks_data():
-    stocks = []
-    if os.path.isfile(STOCKS_FILE):
-        with open(STOCKS_FILE, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                stocks.append(row)
-    return stocks
+def load_stocks_data(screen=DEFAULT_SCREEN):
+    return load_columns(screen["stocks_file"], os.path.join(screen["store_dir"], "stocks"), "stock")
 
 
-def load_industry_data():
-    industries = []
-    if os.path.isfile(INDUSTRY_FILE):
-        with open(INDUSTRY_FILE, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                industries.append(row)
-    return industries
+def load_industry_data(screen=DEFAULT_SCREEN):
+    return load_columns(screen["industry_file"], os.path.join(screen["store_dir"], "industries"), "industry", "count")
 
 
-def filter_by_timeframe(data, days=None, start_date=None, end_date=None):
+def filter_by_timeframe(data, days=None, start_date=None, end_date=None, sessions=None):
     if not data:
         return data
     
-    today = datetime.now().date()
+    today = market_today()
     
-    if days is not None:
+    if sessions is not None:
+        start = last_sessions_start(today, sessions)
+        end = today
+    elif days is not None:
         start = today - timedelta(days=days)
         end = today
     elif start_date and end_date:
@@ -62,7 +113,7 @@ def filter_by_ytd(data):
     if not data:
         return data
     
-    today = datetime.now().date()
+    today = market_today()
     start_of_year = datetime(today.year, 1, 1).date()
     
     filtered = []
@@ -78,15 +129,17 @@ def filter_by_ytd(data):
     return filtered
 
 
-def get_stock_counts(stocks_data):
+def get_stock_counts(stocks_data, industry_of=None):
+    industry_of = industry_of or {}
     counts = defaultdict(lambda: {"count": 0, "industries": set(), "dates": []})
     for row in stocks_data:
         stock = row.get("stock", "")
         if not stock:
             continue
         counts[stock]["count"] += 1
-        if row.get("industry"):
-            counts[stock]["industries"].add(row["industry"])
+        industry = row.get("industry") or industry_of.get(stock)
+        if industry:
+            counts[stock]["industries"].add(industry)
         if row.get("date"):
             counts[stock]["dates"].append(row["date"])
     
@@ -112,78 +165,342 @@ def get_industry_totals(industry_data):
 
 
 def get_date_range(data):
-    if not data:
-        return None, None
-    dates = []
+    first = last = None
     for row in data:
-        if "date" in row and row["date"]:
-            dates.append(row["date"])
-    if not dates:
-        return None, None
-    return min(dates), max(dates)
+        value = row.get("date")
+        if not value:
+            continue
+        if first is None or value < first:
+            first = value
+        if last is None or value > last:
+            last = value
+    return first, last
 
 
-def generate_dashboard():
-    stocks_data = load_stocks_data()
-    industry_data = load_industry_data()
+def generate_dashboard(full_rebuild=False, compress=False, workers=1, screen=DEFAULT_SCREEN, backend="auto"):
+    today = market_today()
+    stocks_file = screen["stocks_file"]
+    industry_file = screen["industry_file"]
+    docs_dir = screen["docs_dir"]
+    output_file = os.path.join(docs_dir, "index.html")
+    stocks_store = os.path.join(screen["store_dir"], "stocks")
+    industry_store = os.path.join(screen["store_dir"], "industries")
     
-    min_date, max_date = get_date_range(stocks_data)
-    if min_date is None:
-        min_date, max_date = get_date_range(industry_data)
+    with metrics.span("export"):
+        # Only months that gained rows are rewritten.
+        months = export_partitions(stocks_file, stocks_store, "stock", full=full_rebuild)
+        months += export_partitions(industry_file, industry_store, "industry", "count", full=full_rebuild)
+        metrics.count("partitions_written", len(months))
     
-    all_stock_counts = get_stock_counts(stocks_data)
-    all_industry_totals = get_industry_totals(industry_data)
+    with metrics.span("cache_check"):
+        cache = {} if full_rebuild else load_cache(screen["cache_file"])
+        # Windows are counted in sessions (plus the calendar year for YTD),
+        # so weekend and holiday runs build what the last session built.
+        key = build_key(
+            [stocks_file, industry_file, MAP_FILE],
+            GENERATOR_SOURCES,
+            {
+                "session": last_sessions_start(today, 1).isoformat(),
+                "year": today.year,
+                "compress": compress,
+                "brotli": brotli is not None,
+                "title": screen["title"],
+            },
+        )
+        if outputs_current(cache, key):
+            metrics.count("build_cache_hit")
+            print(f"Dashboard up to date: {output_file}")
+            return output_file
     
-    timeframes = {
-        "1w": filter_by_timeframe(stocks_data, days=7),
-        "2w": filter_by_timeframe(stocks_data, days=14),
-        "3w": filter_by_timeframe(stocks_data, days=21),
-        "1m": filter_by_timeframe(stocks_data, days=30),
-        "3m": filter_by_timeframe(stocks_data, days=90),
-        "6m": filter_by_timeframe(stocks_data, days=180),
-        "ytd": filter_by_ytd(stocks_data),
-        "1y": filter_by_timeframe(stocks_data, days=365),
-        "all": stocks_data
-    }
+    # With a SQLite copy in sync with the CSVs, every window's ranking (and
+    # the day buckets, when the snapshot can't be used) comes from indexed
+    # GROUP BY queries instead.
+    db = open_synced(screen) if backend != "csv" else None
+    if backend == "sqlite" and db is None:
+        raise Exception(f"{screen['db_file']} is missing or out of date; run python sqlite_store.py --import")
     
-    industry_timeframes = {
-        "1w": filter_by_timeframe(industry_data, days=7),
-        "2w": filter_by_timeframe(industry_data, days=14),
-        "3w": filter_by_timeframe(industry_data, days=21),
-        "1m": filter_by_timeframe(industry_data, days=30),
-        "3m": filter_by_timeframe(industry_data, days=90),
-        "6m": filter_by_timeframe(industry_data, days=180),
-        "ytd": filter_by_ytd(industry_data),
-        "1y": filter_by_timeframe(industry_data, days=365),
-        "all": industry_data
-    }
+    with metrics.span("load"):
+        datasets = load_snapshot(screen["state_file"])
+        stock_days, total_records = update_days(
+            datasets, "stocks", stocks_file, "stock",
+            full_rebuild=full_rebuild,
+            loader=lambda: load_days(db, "stocks") if db is not None else bucket_tables(read_partitions(stocks_store)),
+        )
+        industry_days, industry_records = update_days(
+            datasets, "industries", industry_file, "industry", "count",
+            full_rebuild=full_rebuild,
+            loader=lambda: load_days(db, "industries") if db is not None else bucket_tables(read_partitions(industry_store)),
+        )
+        states, session, datasets["streaks"] = update_states(
+            None if full_rebuild else datasets.get("streaks"), stock_days, datasets.get("stocks", {}).get("base")
+        )
+        industry_of = industry_lookup(load_mapping())
+    metrics.count("stock_rows", total_records)
+    metrics.count("industry_rows", industry_records)
     
-    stocks_json = {}
-    industries_json = {}
-    for key, data in timeframes.items():
-        stocks_json[key] = get_stock_counts(data)
-    for key, data in industry_timeframes.items():
-        industries_json[key] = get_industry_totals(data)
+    with metrics.span("aggregate"):
+        min_date, max_date = day_range(stock_days)
+        if min_date is None:
+            min_date, max_date = day_range(industry_days)
+        
+        if db is not None:
+            metrics.count("sqlite_backend")
+            stocks_json = stock_entries(window_counts(db, "stocks", today), industry_of)
+            industries_json = industry_entries(window_counts(db, "industries", today))
+            db.close()
+        else:
+            stocks_json = stock_windows(stock_days, today, industry_of, workers, outer_totals(datasets, "stocks", stock_days, today))
+            industries_json = industry_windows(industry_days, today, workers, outer_totals(datasets, "industries", industry_days, today))
+        stats = stock_stats(states, session)
+        # Saved after aggregating, so the snapshot carries this build's
+        # window totals and the day shards below see final segment names.
+        save_snapshot(datasets, screen["state_file"])
     
-    html = generate_html(stocks_json, industries_json, min_date, max_date, len(stocks_data))
+    with metrics.span("render"):
+        shards_dir = os.path.join(docs_dir, "data")
+        tags = day_shard_tags(datasets, day_shard_keys(stock_days, industry_days), min_date)
+        reuse = {name for name, tag in tags.items() if unchanged(cache, shard_paths(shards_dir, name, compress), tag, name)}
+        shards = build_shards(stocks_json, industries_json, min_date, stock_days, industry_days, stats, reuse)
     
-    os.makedirs(DOCS_DIR, exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write(html)
+    with metrics.span("write"):
+        built = {"key": key, "sources": {}, "outputs": {}}
+        data_version = write_shards(shards, compress=compress, cache=cache, built=built, shards_dir=shards_dir, sources=tags)
+        html = generate_html(data_version, min_date, max_date, total_records, screen["title"]).encode("utf-8")
+        html_digest = bytes_digest(html)
+        if not unchanged(cache, [output_file], html_digest, "index"):
+            os.makedirs(docs_dir, exist_ok=True)
+            write_atomic(output_file, html)
+            metrics.count("bytes_written", len(html))
+        built["sources"]["index"] = html_digest
+        built["outputs"][output_file] = html_digest
+        save_cache(built, screen["cache_file"])
     
-    print(f"Dashboard generated: {OUTPUT_FILE}")
-    return OUTPUT_FILE
+    print(f"Dashboard generated: {output_file}")
+    return output_file
+
+
+def outer_totals(datasets, key, days, today):
+    # Brings the dataset's totals from before every bounded window up to
+    # `today` and keeps them in the snapshot for the next build.
+    entry = datasets.get(key)
+    if entry is None:
+        return None
+    entry["outer"] = update_outer(days, today, entry.get("outer"))
+    return entry["outer"]
+
+
+def encode_json(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def name_table(entries, name_of, first_of):
+    # Ids follow first appearance in the data (first row index), so names
+    # keep their ids as rows are appended and past years' day shards stay
+    # valid.
+    return {name_of(entry): index for index, entry in enumerate(sorted(entries, key=first_of))}
+
+
+def day_series(days, ordinals, ids):
+    # Per name: positions within `ordinals` (delta encoded) and that day's
+    # count, with the counts list collapsed to 0 when every count is 1.
+    series = {}
+    for position, day in enumerate(ordinals):
+        names = days.get(day)
+        if not names:
+            continue
+        for name, (count, _) in names.items():
+            series.setdefault(ids[name], []).append((position, count))
+    result = {"id": [], "days": [], "counts": []}
+    for name_id in sorted(series):
+        points = series[name_id]
+        previous = 0
+        deltas = []
+        for position, _ in points:
+            deltas.append(position - previous)
+            previous = position
+        counts = [count for _, count in points]
+        result["id"].append(name_id)
+        result["days"].append(deltas)
+        result["counts"].append(0 if all(count == 1 for count in counts) else counts)
+    return result
 
 
-def generate_html(stocks_json, industries_json, min_date, max_date, total_records):
-    import json
+def day_shard_keys(stock_days, industry_days):
+    # {"days-YYYY": [day ordinals]}: one day shard per calendar year, so an
+    # appended session only changes the current year's shard.
+    years = {}
+    for day in sorted({day for days in (stock_days, industry_days or {}) for day in days if day is not None}):
+        years.setdefault(f"days-{date.fromordinal(day).year}", []).append(day)
+    return years
+
+
+def day_shard_tags(datasets, years, base_date):
+    # Stands in for a day shard's bytes in the build cache: the year's month
+    # segments (named by content digest), the snapshot bases its ids and
+    # offsets grow from, and the generator. An unchanged year is then
+    # neither read from the snapshot nor encoded.
+    generator = [file_digest(path) for path in GENERATOR_SOURCES]
+    tags = {}
+    for name in years:
+        prefix = name[len("days-"):] + "-"
+        parts = [SCHEMA_VERSION, generator, base_date]
+        for dataset in ("stocks", "industries"):
+            entry = datasets.get(dataset, {})
+            segments = entry["days"].segments if "days" in entry else {}
+            parts.append([entry.get("base"), sorted(segment for month, segment in segments.items() if month.startswith(prefix))])
+        tags[name] = bytes_digest(json.dumps(parts).encode("utf-8"))
+    return tags
+
+
+def day_shard(stock_days, industry_days, ordinals, stock_ids, industry_ids, base):
+    # Lets the page total any date range per name with two binary searches
+    # over these per-day series instead of shipping every possible window.
+    return {
+        "schema": SCHEMA_VERSION,
+        "days": [day - base.toordinal() for day in ordinals],
+        "stocks": day_series(stock_days, ordinals, stock_ids),
+        "industries": day_series(industry_days, ordinals, industry_ids),
+    }
+
+
+def stats_table(stock_ids, stats, day_offset):
+    # Parallel arrays aligned with the stock name table.
+    empty = {"first_seen": "N/A", "streak": 0, "best_streak": 0, "recent": 0, "prior": 0}
+    rows = [stats.get(name, empty) for name in stock_ids]
+    table = {"first_seen": [day_offset(row["first_seen"]) for row in rows]}
+    for field in ("streak", "best_streak", "recent", "prior"):
+        table[field] = [row[field] for row in rows]
+    return table
+
+
+def build_shards(stocks_json, industries_json, base_date=None, stock_days=None, industry_days=None, stats=None, reuse=()):
+    # Schema 3: names.json holds the shared stock/industry name tables, each
+    # stock's industry id (-1 when unmapped), per-stock streak/momentum stats
+    # as of the latest session, the base date and the day shards'
+    # names (positions in each restart at 0); each timeframe
+    # shard holds parallel id/count/last-seen arrays, last seen as a day offset
+    # from the base date (-1 when unknown), and per industry the ids of the
+    # window's stocks in it, so drill-downs need no client-side join. Day
+    # shards named in `reuse` are left as None for write_shards to keep.
+    stock_ids = name_table(stocks_json.get("all", []), lambda entry: entry["stock"], lambda entry: entry["first"])
+    industry_ids = name_table(industries_json.get("all", []), lambda entry: entry[0], lambda entry: entry[2])
+    stock_industry = {}
+    for entry in stocks_json.get("all", []):
+        industry = entry.get("industry", "N/A")
+        if industry == "N/A":
+            continue
+        if industry not in industry_ids:
+            industry_ids[industry] = len(industry_ids)
+        stock_industry[entry["stock"]] = industry_ids[industry]
+    base = date.fromisoformat(base_date) if base_date else None
+
+    def day_offset(value):
+        if base is None or value in (None, "N/A"):
+            return -1
+        return (date.fromisoformat(value) - base).days
+
+    years = day_shard_keys(stock_days, industry_days) if base is not None and stock_days is not None else {}
+    shards = {"names": encode_json({
+        "schema": SCHEMA_VERSION,
+        "base_date": base_date,
+        "day_shards": list(years),
+        "stocks": list(stock_ids),
+        "industries": list(industry_ids),
+        "stock_industry": [stock_industry.get(name, -1) for name in stock_ids],
+        "stats": stats_table(stock_ids, stats or {}, day_offset),
+    })}
+    for key, stocks in stocks_json.items():
+        industries = industries_json.get(key, [])
+        members = {}
+        for entry in stocks:
+            industry = stock_industry.get(entry["stock"])
+            if industry is not None:
+                members.setdefault(industry, []).append(stock_ids[entry["stock"]])
+        shards[key] = encode_json({
+            "schema": SCHEMA_VERSION,
+            "stocks": {
+                "id": [stock_ids[entry["stock"]] for entry in stocks],
+                "count": [entry["count"] for entry in stocks],
+                "last_seen": [day_offset(entry["last_seen"]) for entry in stocks],
+            },
+            "industries": {
+                "id": [industry_ids[name] for name, _, _ in industries],
+                "count": [count for _, count, _ in industries],
+                "stocks": [members.get(industry_ids[name], []) for name, _, _ in industries],
+            },
+        })
+    for name, ordinals in years.items():
+        shards[name] = None if name in reuse else encode_json(
+            day_shard(stock_days, industry_days or {}, ordinals, stock_ids, industry_ids, base)
+        )
+    return shards
+
+
+def shard_paths(shards_dir, key, compress=False):
+    path = os.path.join(shards_dir, f"{key}.json")
+    paths = [path]
+    if compress:
+        paths.append(path + ".gz")
+        if brotli is not None:
+            paths.append(path + ".br")
+    return paths
+
+
+def write_shards(shards, compress=False, cache=None, built=None, shards_dir=SHARDS_DIR, sources=None):
+    # One JSON file per shard next to index.html; the returned version goes
+    # into the page so browsers never mix shards from different builds.
+    # Shards whose source matches the previous build (`cache`) are neither
+    # recompressed nor rewritten; `built` collects this build's digests. A
+    # shard's source is the digest of its bytes unless `sources` gives one,
+    # and a None body means the caller already found it unchanged. Files of
+    # shards no longer built are removed.
+    cache = cache or {}
+    sources = sources or {}
+    built = built if built is not None else {"sources": {}, "outputs": {}}
+    os.makedirs(shards_dir, exist_ok=True)
+    digest = hashlib.sha1()
+    written = 0
+    reused = 0
+    for key, body in shards.items():
+        paths = shard_paths(shards_dir, key, compress)
+        path = paths[0]
+        for suffix in (".gz", ".br"):
+            if path + suffix not in paths and os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        source = sources.get(key) or bytes_digest(body)
+        built["sources"][key] = source
+        if body is None or unchanged(cache, paths, source, key):
+            for variant in paths:
+                built["outputs"][variant] = cache["outputs"][variant]
+            digest.update(key.encode("utf-8") + b"\0" + built["outputs"][path].encode("utf-8"))
+            reused += 1
+            continue
+        digest.update(key.encode("utf-8") + b"\0" + bytes_digest(body).encode("utf-8"))
+        variants = {path: body}
+        if compress:
+            variants[path + ".gz"] = gzip.compress(body, 9, mtime=0)
+            if brotli is not None:
+                variants[path + ".br"] = brotli.compress(body)
+        for variant, data in variants.items():
+            write_atomic(variant, data)
+            built["outputs"][variant] = bytes_digest(data)
+            written += len(data)
+    for name in os.listdir(shards_dir):
+        if name.split(".")[0] not in shards:
+            os.remove(os.path.join(shards_dir, name))
+    metrics.count("shard_bytes_written", written)
+    metrics.count("shards_reused", reused)
+    return digest.hexdigest()[:12]
+
+
+def generate_html(data_version, min_date, max_date, total_records, title=DEFAULT_SCREEN["title"]):
     
     html = f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Top Gainers Dashboard</title>
+    <title>{title} Dashboard</title>
     <link href="https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600;700&family=Space+Grotesk:wght@400;500;600;700&display=swap" rel="stylesheet">
     <style>
         :root {{
@@ -306,11 +623,47 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             background: var(--bg-hover);
         }}
         
-        .timeframe-btn.active {{
+        .timeframe-btn.active, .range-btn.active {{
             background: var(--accent-green);
             color: var(--bg-primary);
         }}
         
+        .range-picker {{
+            display: flex;
+            align-items: center;
+            gap: 6px;
+            padding-left: 8px;
+            border-left: 1px solid var(--border);
+        }}
+        
+        .range-picker input {{
+            font-family: 'JetBrains Mono', monospace;
+            font-size: 12px;
+            background: var(--bg-card);
+            color: var(--text-primary);
+            border: 1px solid var(--border);
+            border-radius: 6px;
+            padding: 7px 8px;
+            color-scheme: dark;
+        }}
+        
+        .range-btn {{
+            font-family: 'JetBrains Mono', monospace;
+            font-size: 13px;
+            font-weight: 500;
+            padding: 10px 16px;
+            border: none;
+            background: transparent;
+            color: var(--text-secondary);
+            cursor: pointer;
+            border-radius: 8px;
+        }}
+        
+        .range-btn:hover {{
+            color: var(--text-primary);
+            background: var(--bg-hover);
+        }}
+        
         .grid {{
             display: grid;
             grid-template-columns: 1fr 400px;
@@ -427,9 +780,49 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             background: var(--bg-hover);
         }}
         
+        th.sortable {{
+            cursor: pointer;
+            user-select: none;
+        }}
+        
+        th.sortable:hover, th.sorted {{
+            color: var(--text-primary);
+        }}
+        
+        th.stat-cell, td.stat-cell {{
+            padding-left: 12px;
+            padding-right: 12px;
+            white-space: nowrap;
+        }}
+        
+        .momentum-up {{
+            color: var(--accent-green);
+        }}
+        
+        .momentum-down {{
+            color: var(--text-muted);
+        }}
+        
+        .stock-row {{
+            height: 49px;
+        }}
+        
+        .stock-row td {{
+            padding-top: 0;
+            padding-bottom: 0;
+        }}
+        
+        .spacer td, .spacer {{
+            padding: 0;
+            border: none;
+        }}
+        
         .stock-name {{
             font-weight: 600;
             color: var(--text-primary);
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
         }}
         
         .stock-industry {{
@@ -465,6 +858,7 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             padding: 14px 16px;
             border-radius: 10px;
             margin-bottom: 4px;
+            cursor: pointer;
             transition: background 0.2s ease;
         }}
         
@@ -472,6 +866,19 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             background: var(--bg-hover);
         }}
         
+        .industry-stocks {{
+            padding: 4px 16px 12px 28px;
+        }}
+        
+        .industry-stock {{
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            font-size: 13px;
+            color: var(--text-secondary);
+            padding: 4px 0;
+        }}
+        
         .industry-name {{
             font-size: 14px;
             font-weight: 500;
@@ -531,23 +938,29 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             <div class="logo">
                 <div class="logo-icon">▲</div>
                 <div>
-                    <h1>Top Gainers Dashboard</h1>
-                    <p class="subtitle">Track stocks appearing on the daily top gainers list</p>
+                    <h1>{title} Dashboard</h1>
+                    <p class="subtitle">Track stocks appearing on the daily {title.lower()} list</p>
                 </div>
             </div>
         </header>
         
         
         <div class="timeframe-selector">
-            <button class="timeframe-btn" data-tf="1w">1W</button>
-            <button class="timeframe-btn" data-tf="2w">2W</button>
-            <button class="timeframe-btn" data-tf="3w">3W</button>
-            <button class="timeframe-btn" data-tf="1m">1M</button>
-            <button class="timeframe-btn" data-tf="3m">3M</button>
-            <button class="timeframe-btn" data-tf="6m">6M</button>
+            <button class="timeframe-btn" data-tf="1w" title="Last 5 trading sessions">1W</button>
+            <button class="timeframe-btn" data-tf="2w" title="Last 10 trading sessions">2W</button>
+            <button class="timeframe-btn" data-tf="3w" title="Last 15 trading sessions">3W</button>
+            <button class="timeframe-btn" data-tf="1m" title="Last 21 trading sessions">1M</button>
+            <button class="timeframe-btn" data-tf="3m" title="Last 63 trading sessions">3M</button>
+            <button class="timeframe-btn" data-tf="6m" title="Last 126 trading sessions">6M</button>
             <button class="timeframe-btn" data-tf="ytd">YTD</button>
-            <button class="timeframe-btn" data-tf="1y">1Y</button>
+            <button class="timeframe-btn" data-tf="1y" title="Last 252 trading sessions">1Y</button>
             <button class="timeframe-btn active" data-tf="all">All</button>
+            <div class="range-picker">
+                <input type="date" id="range-start" min="{min_date or ''}" max="{max_date or ''}" value="{min_date or ''}">
+                <span class="date-cell">→</span>
+                <input type="date" id="range-end" min="{min_date or ''}" max="{max_date or ''}" value="{max_date or ''}">
+                <button class="range-btn" id="range-apply">Apply</button>
+            </div>
         </div>
         
         <div class="grid">
@@ -579,24 +992,288 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
     </div>
     
     <script>
-        const stocksData = {json.dumps(stocks_json)};
-        const industriesData = {json.dumps(industries_json)};
+        const DATA_VERSION = '{data_version}';
+        const SCHEMA_VERSION = {SCHEMA_VERSION};
+        const shardRequests = {{}};
+        let namesRequest = null;
+        const ROW_HEIGHT = 49;
+        const OVERSCAN_ROWS = 10;
+        const SEARCH_GRAM = 3;
+        const SEARCH_DEBOUNCE_MS = 120;
+        const INDUSTRY_STOCKS = 10;
+        const MOMENTUM_SESSIONS = {MOMENTUM_SESSIONS};
         
         let currentTimeframe = 'all';
+        let currentShard = {{ stocks: [], industries: [] }};
         let searchQuery = '';
+        let expandedIndustry = null;
+        
+        function fetchJson(name) {{
+            return fetch(`data/${{name}}.json?v=${{DATA_VERSION}}`).then(response => {{
+                if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+                return response.json();
+            }}).then(payload => {{
+                if (payload.schema !== SCHEMA_VERSION) throw new Error(`Unsupported data schema ${{payload.schema}}`);
+                return payload;
+            }});
+        }}
+        
+        function loadNames() {{
+            if (!namesRequest) {{
+                namesRequest = fetchJson('names').then(names => {{
+                    const base = names.base_date ? Date.parse(names.base_date + 'T00:00:00Z') : null;
+                    const days = new Map();
+                    names.formatDay = offset => {{
+                        if (offset < 0 || base === null) return 'N/A';
+                        if (!days.has(offset)) days.set(offset, new Date(base + offset * 86400000).toISOString().slice(0, 10));
+                        return days.get(offset);
+                    }};
+                    return names;
+                }});
+                namesRequest.catch(() => {{ namesRequest = null; }});
+            }}
+            return namesRequest;
+        }}
+        
+        function stockEntry(names, id, count, lastSeen) {{
+            const industry = names.stock_industry ? names.stock_industry[id] : -1;
+            const stats = names.stats;
+            return {{
+                stock: names.stocks[id],
+                count,
+                last_seen: lastSeen,
+                industry: industry >= 0 ? names.industries[industry] : '',
+                first_seen: stats ? names.formatDay(stats.first_seen[id]) : 'N/A',
+                streak: stats ? stats.streak[id] : 0,
+                best_streak: stats ? stats.best_streak[id] : 0,
+                recent: stats ? stats.recent[id] : 0,
+                prior: stats ? stats.prior[id] : 0,
+            }};
+        }}
+        
+        function decodeShard(names, shard) {{
+            const s = shard.stocks;
+            const stocks = new Array(s.id.length);
+            const byId = new Map();
+            for (let i = 0; i < s.id.length; i++) {{
+                stocks[i] = stockEntry(names, s.id[i], s.count[i], names.formatDay(s.last_seen[i]));
+                byId.set(s.id[i], stocks[i]);
+            }}
+            const ind = shard.industries;
+            const industries = new Array(ind.id.length);
+            for (let i = 0; i < ind.id.length; i++) {{
+                const members = ind.stocks ? ind.stocks[i].map(id => byId.get(id)) : [];
+                industries[i] = [names.industries[ind.id[i]], ind.count[i], members];
+            }}
+            return {{ stocks, industries }};
+        }}
+        
+        let dayIndexRequest = null;
+        
+        // Day shards number their days from 0; concatenated in order, a
+        // shard's positions are offset by the days of the shards before it.
+        function decodeSeries(parts, key) {{
+            const points = new Map();
+            let offset = 0;
+            for (const part of parts) {{
+                const series = part[key];
+                series.id.forEach((id, k) => {{
+                    const deltas = series.days[k];
+                    const counts = series.counts[k];
+                    let point = points.get(id);
+                    if (!point) points.set(id, point = {{ days: [], counts: [] }});
+                    let day = offset;
+                    for (let i = 0; i < deltas.length; i++) {{
+                        day += deltas[i];
+                        point.days.push(day);
+                        point.counts.push(counts ? counts[i] : 1);
+                    }}
+                }});
+                offset += part.days.length;
+            }}
+            return Array.from(points, ([id, point]) => {{
+                const totals = new Float64Array(point.counts.length);
+                let total = 0;
+                for (let i = 0; i < point.counts.length; i++) {{
+                    total += point.counts[i];
+                    totals[i] = total;
+                }}
+                return {{ id, days: Int32Array.from(point.days), totals }};
+            }});
+        }}
+        
+        function loadDayIndex() {{
+            if (!dayIndexRequest) {{
+                dayIndexRequest = loadNames()
+                    .then(names => Promise.all(names.day_shards.map(fetchJson)))
+                    .then(parts => ({{
+                        days: parts.flatMap(part => part.days),
+                        stocks: decodeSeries(parts, 'stocks'),
+                        industries: decodeSeries(parts, 'industries'),
+                    }}));
+                dayIndexRequest.catch(() => {{ dayIndexRequest = null; }});
+            }}
+            return dayIndexRequest;
+        }}
+        
+        function lowerBound(values, target) {{
+            let lo = 0, hi = values.length;
+            while (lo < hi) {{
+                const mid = (lo + hi) >> 1;
+                if (values[mid] < target) lo = mid + 1; else hi = mid;
+            }}
+            return lo;
+        }}
+        
+        // Totals for trading-day positions first..last: per name, the
+        // difference of two cumulative counts found by binary search.
+        function rangeTotals(series, first, last) {{
+            const rows = [];
+            for (const s of series) {{
+                const lo = lowerBound(s.days, first);
+                const hi = lowerBound(s.days, last + 1);
+                if (hi <= lo) continue;
+                rows.push([s.id, s.totals[hi - 1] - (lo > 0 ? s.totals[lo - 1] : 0), s.days[hi - 1]]);
+            }}
+            return rows.sort((a, b) => b[1] - a[1] || a[0] - b[0]);
+        }}
+        
+        async function loadRange(start, end) {{
+            const [names, index] = await Promise.all([loadNames(), loadDayIndex()]);
+            const offset = value => Math.round((Date.parse(value + 'T00:00:00Z') - Date.parse(names.base_date + 'T00:00:00Z')) / 86400000);
+            const first = lowerBound(index.days, offset(start));
+            const last = lowerBound(index.days, offset(end) + 1) - 1;
+            // Ranges have no precomputed drill-downs; group the range's stocks here.
+            const members = new Map();
+            const stocks = rangeTotals(index.stocks, first, last).map(([id, count, day]) => {{
+                const stock = stockEntry(names, id, count, names.formatDay(index.days[day]));
+                const industry = names.stock_industry ? names.stock_industry[id] : -1;
+                if (industry >= 0) {{
+                    if (!members.has(industry)) members.set(industry, []);
+                    members.get(industry).push(stock);
+                }}
+                return stock;
+            }});
+            return {{
+                stocks,
+                industries: rangeTotals(index.industries, first, last).map(([id, count]) => [names.industries[id], count, members.get(id) || []]),
+            }};
+        }}
+        
+        function loadShard(tf) {{
+            if (!shardRequests[tf]) {{
+                if (tf.startsWith('range:')) {{
+                    const [, start, end] = tf.split(':');
+                    shardRequests[tf] = loadRange(start, end);
+                }} else {{
+                    shardRequests[tf] = Promise.all([loadNames(), fetchJson(tf)]).then(([names, shard]) => decodeShard(names, shard));
+                }}
+                shardRequests[tf].catch(() => {{ delete shardRequests[tf]; }});
+            }}
+            return shardRequests[tf];
+        }}
+        
+        async function showTimeframe(tf) {{
+            currentTimeframe = tf;
+            let shard;
+            try {{
+                shard = await loadShard(tf);
+            }} catch (err) {{
+                shard = {{ stocks: [], industries: [] }};
+            }}
+            if (tf !== currentTimeframe) return;
+            currentShard = shard;
+            renderStocks();
+            renderIndustries();
+        }}
+        
+        // Substring search over a per-timeframe n-gram index: every 1-3
+        // character gram maps to the (rank-ordered) rows containing it, so a
+        // query only ever checks the rows in its rarest gram's posting list.
+        function buildSearchIndex(stocks) {{
+            const keys = stocks.map(s => (s.stock + '\\n' + (s.industry || '')).toLowerCase());
+            const grams = new Map();
+            keys.forEach((key, row) => {{
+                const seen = new Set();
+                for (let n = 1; n <= SEARCH_GRAM; n++) {{
+                    for (let i = 0; i + n <= key.length; i++) {{
+                        const gram = key.slice(i, i + n);
+                        if (gram.includes('\\n') || seen.has(gram)) continue;
+                        seen.add(gram);
+                        if (!grams.has(gram)) grams.set(gram, []);
+                        grams.get(gram).push(row);
+                    }}
+                }}
+            }});
+            return {{ keys, grams }};
+        }}
+        
+        function searchRows(shard, query) {{
+            if (!shard.searchIndex) shard.searchIndex = buildSearchIndex(shard.stocks);
+            const {{ keys, grams }} = shard.searchIndex;
+            if (query.length <= SEARCH_GRAM) return grams.get(query) || [];
+            let candidates = null;
+            for (let i = 0; i + SEARCH_GRAM <= query.length; i++) {{
+                const rows = grams.get(query.slice(i, i + SEARCH_GRAM));
+                if (!rows) return [];
+                if (!candidates || rows.length < candidates.length) candidates = rows;
+            }}
+            return candidates.filter(row => keys[row].includes(query));
+        }}
+        
+        let visibleRows = null;
+        let scrollPending = false;
+        
+        const SORT_KEYS = {{
+            count: s => s.count,
+            streak: s => s.streak,
+            best_streak: s => s.best_streak,
+            momentum: s => s.recent - s.prior,
+            first_seen: s => s.first_seen === 'N/A' ? '' : s.first_seen,
+            last_seen: s => s.last_seen === 'N/A' ? '' : s.last_seen,
+        }};
+        let sortKey = 'count';
+        let sortDesc = true;
+        
+        // Row order for the current sort, cached per shard; null means the
+        // shard's own ranking (count, then first appearance).
+        function sortedRows(shard) {{
+            if (sortKey === 'count' && sortDesc) return null;
+            const cacheKey = `${{sortKey}}:${{sortDesc ? 'desc' : 'asc'}}`;
+            if (!shard.orders) shard.orders = {{}};
+            if (!shard.orders[cacheKey]) {{
+                const value = SORT_KEYS[sortKey];
+                const stocks = shard.stocks;
+                const keys = stocks.map(value);
+                const direction = sortDesc ? -1 : 1;
+                shard.orders[cacheKey] = stocks.map((_, i) => i).sort((a, b) => (
+                    keys[a] === keys[b] ? a - b : (keys[a] < keys[b] ? -direction : direction)
+                ));
+            }}
+            return shard.orders[cacheKey];
+        }}
+        
+        function sortHeader(key, label, className = '') {{
+            const arrow = key === sortKey ? (sortDesc ? ' ↓' : ' ↑') : '';
+            return `<th class="sortable ${{className}} ${{key === sortKey ? 'sorted' : ''}}" data-sort="${{key}}">${{label}}${{arrow}}</th>`;
+        }}
         
         function renderStocks() {{
             const container = document.getElementById('stocks-table');
-            let data = stocksData[currentTimeframe] || [];
-            
-            if (searchQuery) {{
-                data = data.filter(s => 
-                    s.stock.toLowerCase().includes(searchQuery.toLowerCase()) ||
-                    (s.industry && s.industry.toLowerCase().includes(searchQuery.toLowerCase()))
-                );
+            const stocks = currentShard.stocks || [];
+            const query = searchQuery.trim().toLowerCase();
+            const matches = query ? searchRows(currentShard, query) : null;
+            const order = sortedRows(currentShard);
+            if (order && matches) {{
+                const keep = new Uint8Array(stocks.length);
+                matches.forEach(row => {{ keep[row] = 1; }});
+                visibleRows = order.filter(row => keep[row]);
+            }} else {{
+                visibleRows = order || matches;
             }}
+            const total = visibleRows ? visibleRows.length : stocks.length;
             
-            if (data.length === 0) {{
+            if (total === 0) {{
                 container.innerHTML = `
                     <div class="empty-state">
                         <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
@@ -609,40 +1286,65 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
                 return;
             }}
             
-            let html = `
+            container.innerHTML = `
                 <table>
                     <thead>
                         <tr>
                             <th>#</th>
                             <th>Stock</th>
-                            <th>Count</th>
-                            <th>Last Seen</th>
+                            ${{sortHeader('count', 'Count')}}
+                            ${{sortHeader('streak', 'Streak', 'stat-cell')}}
+                            ${{sortHeader('best_streak', 'Best', 'stat-cell')}}
+                            ${{sortHeader('momentum', `${{MOMENTUM_SESSIONS}}D vs Prior`, 'stat-cell')}}
+                            ${{sortHeader('first_seen', 'First Seen', 'stat-cell')}}
+                            ${{sortHeader('last_seen', 'Last Seen')}}
                         </tr>
                     </thead>
-                    <tbody>
+                    <tbody id="stocks-body"></tbody>
+                </table>
             `;
+            container.scrollTop = 0;
+            renderStockWindow();
+        }}
+        
+        // Only the rows inside the scroll viewport (plus a small margin) exist
+        // in the DOM; spacer rows keep the scrollbar at full height.
+        function renderStockWindow() {{
+            const container = document.getElementById('stocks-table');
+            const body = document.getElementById('stocks-body');
+            if (!body) return;
+            const stocks = currentShard.stocks || [];
+            const total = visibleRows ? visibleRows.length : stocks.length;
+            const first = Math.max(0, Math.floor(container.scrollTop / ROW_HEIGHT) - OVERSCAN_ROWS);
+            const last = Math.min(total, Math.ceil((container.scrollTop + container.clientHeight) / ROW_HEIGHT) + OVERSCAN_ROWS);
             
-            data.forEach((stock, idx) => {{
+            let html = first > 0 ? `<tr class="spacer" style="height: ${{first * ROW_HEIGHT}}px;"></tr>` : '';
+            for (let idx = first; idx < last; idx++) {{
+                const stock = stocks[visibleRows ? visibleRows[idx] : idx];
                 const rankClass = idx < 3 ? `rank-${{idx + 1}}` : '';
                 html += `
-                    <tr>
+                    <tr class="stock-row">
                         <td class="rank ${{rankClass}}">${{idx + 1}}</td>
                         <td>
                             <div class="stock-name">${{stock.stock}}</div>
+                            ${{stock.industry ? `<div class="stock-industry">${{stock.industry}}</div>` : ''}}
                         </td>
                         <td><span class="count-badge">${{stock.count}}</span></td>
+                        <td class="stat-cell date-cell">${{stock.streak}}</td>
+                        <td class="stat-cell date-cell">${{stock.best_streak}}</td>
+                        <td class="stat-cell date-cell ${{stock.recent > stock.prior ? 'momentum-up' : 'momentum-down'}}">${{stock.recent}} / ${{stock.prior}}</td>
+                        <td class="stat-cell date-cell">${{stock.first_seen}}</td>
                         <td class="date-cell">${{stock.last_seen}}</td>
                     </tr>
                 `;
-            }});
-            
-            html += '</tbody></table>';
-            container.innerHTML = html;
+            }}
+            if (last < total) html += `<tr class="spacer" style="height: ${{(total - last) * ROW_HEIGHT}}px;"></tr>`;
+            body.innerHTML = html;
         }}
         
         function renderIndustries() {{
             const container = document.getElementById('industry-list');
-            const data = industriesData[currentTimeframe] || [];
+            const data = currentShard.industries || [];
             
             if (data.length === 0) {{
                 container.innerHTML = `
@@ -656,10 +1358,10 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
             const maxCount = Math.max(...data.map(d => d[1]));
             
             let html = '';
-            data.slice(0, 15).forEach(([industry, count]) => {{
+            data.slice(0, 15).forEach(([industry, count, members], i) => {{
                 const pct = (count / maxCount) * 100;
                 html += `
-                    <div class="industry-item">
+                    <div class="industry-item" data-index="${{i}}">
                         <div style="flex: 1;">
                             <div class="industry-name">${{industry}}</div>
                             <div class="industry-bar">
@@ -669,28 +1371,80 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
                         <div class="industry-count">${{count}}</div>
                     </div>
                 `;
+                if (industry === expandedIndustry) {{
+                    html += `<div class="industry-stocks">`;
+                    if (!members || members.length === 0) {{
+                        html += `<div class="industry-stock">No mapped stocks in this timeframe</div>`;
+                    }}
+                    (members || []).slice(0, INDUSTRY_STOCKS).forEach(stock => {{
+                        html += `<div class="industry-stock"><span>${{stock.stock}}</span><span class="count-badge">${{stock.count}}</span></div>`;
+                    }});
+                    if (members && members.length > INDUSTRY_STOCKS) {{
+                        html += `<div class="industry-stock">+${{members.length - INDUSTRY_STOCKS}} more</div>`;
+                    }}
+                    html += `</div>`;
+                }}
             }});
             
             container.innerHTML = html;
         }}
         
+        // Clicking an industry lists the stocks behind its count.
+        document.getElementById('industry-list').addEventListener('click', event => {{
+            const item = event.target.closest('.industry-item');
+            if (!item) return;
+            const [industry] = (currentShard.industries || [])[Number(item.dataset.index)] || [];
+            expandedIndustry = industry === expandedIndustry ? null : industry;
+            renderIndustries();
+        }});
+        
         document.querySelectorAll('.timeframe-btn').forEach(btn => {{
             btn.addEventListener('click', () => {{
                 document.querySelectorAll('.timeframe-btn').forEach(b => b.classList.remove('active'));
+                document.getElementById('range-apply').classList.remove('active');
                 btn.classList.add('active');
-                currentTimeframe = btn.dataset.tf;
-                renderStocks();
-                renderIndustries();
+                showTimeframe(btn.dataset.tf);
             }});
         }});
         
-        document.getElementById('stock-search').addEventListener('input', (e) => {{
-            searchQuery = e.target.value;
+        document.getElementById('range-apply').addEventListener('click', () => {{
+            let start = document.getElementById('range-start').value;
+            let end = document.getElementById('range-end').value;
+            if (!start || !end) return;
+            if (start > end) [start, end] = [end, start];
+            document.querySelectorAll('.timeframe-btn').forEach(b => b.classList.remove('active'));
+            document.getElementById('range-apply').classList.add('active');
+            showTimeframe(`range:${{start}}:${{end}}`);
+        }});
+        
+        document.getElementById('stocks-table').addEventListener('click', event => {{
+            const header = event.target.closest('th[data-sort]');
+            if (!header) return;
+            const key = header.dataset.sort;
+            sortDesc = key === sortKey ? !sortDesc : true;
+            sortKey = key;
             renderStocks();
         }});
         
-        renderStocks();
-        renderIndustries();
+        document.getElementById('stocks-table').addEventListener('scroll', () => {{
+            if (scrollPending) return;
+            scrollPending = true;
+            requestAnimationFrame(() => {{
+                scrollPending = false;
+                renderStockWindow();
+            }});
+        }});
+        
+        let searchTimer = null;
+        document.getElementById('stock-search').addEventListener('input', (e) => {{
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {{
+                searchQuery = e.target.value;
+                renderStocks();
+            }}, SEARCH_DEBOUNCE_MS);
+        }});
+        
+        showTimeframe(currentTimeframe);
     </script>
 </body>
 </html>
@@ -699,4 +1453,17 @@ def generate_html(stocks_json, industries_json, min_date, max_date, total_record
 
 
 if __name__ == "__main__":
-    generate_dashboard()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="ignore the aggregate snapshot and column store and re-read every CSV row")
+    parser.add_argument("--compress", action="store_true", help="also write .gz (and .br if brotli is installed) copies of each shard")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the window aggregation (output is identical to 1)")
+    parser.add_argument("--screen", action="append", help="only this registered screen (repeatable; default: all)")
+    parser.add_argument("--backend", choices=["auto", "csv", "sqlite"], default="auto", help="auto uses data/history.sqlite when it exists and matches the CSVs")
+    args = parser.parse_args()
+    try:
+        screens = select_screens(args.screen)
+    except ValueError as e:
+        parser.error(str(e))
+    with metrics.run("dashboard"):
+        for screen in screens:
+            generate_dashboard(full_rebuild=args.full, compress=args.compress, workers=args.workers, screen=screen, backend=args.backend)
@@ -0,0 +1,239 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from retry import new_budgets, retry_sync
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120 Safari/537.36"
+)
+TIMEOUT = 30
+PAGE_PARAM = re.compile(r"[?&]page=(\d+)")
+PAGE_OF = re.compile(r"page\s+\d+\s+of\s+(\d+)", re.I)
+RESULTS_FOUND = re.compile(r"(\d[\d,]*)\s+results?\s+found", re.I)
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+class FallbackRequired(Exception):
+    pass
+
+
+class TransientError(FallbackRequired):
+    # Worth retrying (timeouts, 429/5xx) before falling back to the browser.
+    pass
+
+
+def with_page(url, number):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query["page"] = str(number)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def clean_text(parts):
+    return " ".join("".join(parts).split())
+
+
+class ScreenParser(HTMLParser):
+    # Pulls the same structures the browser path evaluates in the page: the
+    # first table's header/rows, industry menu labels and the page count.
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.headers = []
+        self.rows = []
+        self.labels = []
+        self.page_count = 1
+        self.paged = False
+        self.login_form = False
+        self.has_table = False
+        self.text = []
+        self.table_depth = 0
+        self.table_done = False
+        self.row = None
+        self.cell = None
+        self.link = None
+        self.menu_depth = 0
+        self.div_depth = 0
+        self.label = None
+        self.label_has_checkbox = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "a":
+            match = PAGE_PARAM.search(attrs.get("href") or "")
+            if match:
+                self.paged = True
+                self.page_count = max(self.page_count, int(match.group(1)))
+        if tag == "form" and "login" in (attrs.get("action") or ""):
+            self.login_form = True
+        if tag == "div":
+            self.div_depth += 1
+            if not self.menu_depth and attrs.get("role") == "menu":
+                self.menu_depth = self.div_depth
+        if tag == "label":
+            self.label = []
+            self.label_has_checkbox = False
+        if tag == "input" and self.label is not None and attrs.get("type") == "checkbox":
+            self.label_has_checkbox = True
+
+        if tag == "table" and not self.table_done:
+            self.table_depth += 1
+            self.has_table = True
+        if self.table_depth != 1:
+            return
+        if tag == "tr":
+            self.row = {"th": [], "td": [], "links": [], "hrefs": {}}
+        elif tag in ("td", "th") and self.row is not None:
+            self.cell = (tag, [])
+        elif tag == "a" and self.cell is not None and self.link is None:
+            self.link = []
+            self.row["hrefs"].setdefault(len(self.row[self.cell[0]]), attrs.get("href") or "")
+
+    def handle_endtag(self, tag):
+        if tag == "div":
+            if self.menu_depth == self.div_depth:
+                self.menu_depth = 0
+            self.div_depth -= 1
+        if tag == "label" and self.label is not None:
+            if self.menu_depth or self.label_has_checkbox:
+                self.labels.append(clean_text(self.label))
+            self.label = None
+
+        if tag == "table" and self.table_depth:
+            self.table_depth -= 1
+            if not self.table_depth:
+                self.table_done = True
+            return
+        if self.table_depth != 1:
+            return
+        if tag == "a" and self.link is not None and self.cell is not None:
+            self.row["links"].append((len(self.row[self.cell[0]]), clean_text(self.link)))
+            self.link = None
+        elif tag in ("td", "th") and self.cell is not None:
+            kind, parts = self.cell
+            self.row[kind].append(clean_text(parts))
+            self.cell = None
+            self.link = None
+        elif tag == "tr" and self.row is not None:
+            self.finish_row()
+
+    def finish_row(self):
+        row = self.row
+        self.row = None
+        cells = row["td"]
+        if len(cells) < 2:
+            if row["th"] and not self.headers:
+                self.headers = row["th"]
+            return
+        links = dict(row["links"])
+        name = links.get(1) or cells[1]
+        self.rows.append({"name": name, "cells": cells, "url": row["hrefs"].get(1, "")})
+
+    def handle_data(self, data):
+        self.text.append(data)
+        if self.label is not None:
+            self.label.append(data)
+        if self.cell is not None:
+            self.cell[1].append(data)
+        if self.link is not None:
+            self.link.append(data)
+
+
+def parse_screen_html(html):
+    parser = ScreenParser()
+    parser.feed(html)
+    parser.close()
+    text = " ".join(parser.text)
+    match = PAGE_OF.search(text)
+    page_count = max(parser.page_count, int(match.group(1)) if match else 1)
+    results = RESULTS_FOUND.search(text)
+    return {
+        "table": {"headers": parser.headers, "rows": parser.rows},
+        "labels": parser.labels,
+        "page_count": page_count,
+        # False when neither page links nor "page X of Y" were found, so
+        # page_count is only a guess of 1.
+        "paged": parser.paged or match is not None,
+        "result_count": int(results.group(1).replace(",", "")) if results else None,
+        "has_table": parser.has_table,
+        "login_wall": parser.login_form and not parser.rows,
+    }
+
+
+def new_session(pool_size):
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_page(session, url):
+    try:
+        response = session.get(url, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        raise TransientError(f"request failed for {url}: {e}")
+    if response.status_code in TRANSIENT_STATUS:
+        raise TransientError(f"HTTP {response.status_code} for {url}")
+    if response.status_code != 200:
+        raise FallbackRequired(f"HTTP {response.status_code} for {url}")
+    if "/login" in urlsplit(response.url).path:
+        raise FallbackRequired(f"redirected to login for {url}")
+    page = parse_screen_html(response.text)
+    if page["login_wall"]:
+        raise FallbackRequired(f"login wall on {url}")
+    if not page["has_table"]:
+        raise FallbackRequired(f"no results table on {url}")
+    for row in page["table"]["rows"]:
+        if row["url"]:
+            row["url"] = urljoin(response.url, row["url"])
+    return page
+
+
+def fetch_screen(url, concurrency=4, state=None, budgets=None, prepare_session=None):
+    # Fills `state` (see checkpoint.new_state) with every page's table, the
+    # industry labels and the reported counts, skipping pages it already
+    # holds. Transient failures are retried; anything else, or running out
+    # of retries, raises FallbackRequired with the finished pages kept.
+    # `prepare_session` may hook or remount the session (see replay.py).
+    state = state if state is not None else {"pages": {}, "page_count": None, "result_count": None, "labels": None}
+    budgets = budgets if budgets is not None else new_budgets()
+    pages = state["pages"]
+
+    def load(page_url):
+        return retry_sync("http", budgets, lambda attempt: fetch_page(session, page_url), retry_on=(TransientError,))
+
+    session = new_session(concurrency)
+    if prepare_session:
+        prepare_session(session)
+    with session:
+        if "1" not in pages or state["labels"] is None:
+            first = load(url)
+            if not first["labels"]:
+                raise FallbackRequired(f"no industry facet labels on {url}")
+            if not first["paged"] and first["result_count"] is None:
+                # Nothing to size the screen by; the browser walks Next instead.
+                raise FallbackRequired(f"no page count or result count on {url}")
+            pages["1"] = first["table"]
+            state.update(page_count=first["page_count"], result_count=first["result_count"], labels=first["labels"])
+        missing = [number for number in range(2, state["page_count"] + 1) if str(number) not in pages]
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(load, with_page(url, number)): number for number in missing}
+            for future in as_completed(futures):
+                try:
+                    pages[str(futures[future])] = future.result()["table"]
+                except FallbackRequired as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+    tables = [pages[str(number)] for number in range(1, state["page_count"] + 1)]
+    return tables, state["labels"], state["result_count"]
@@ -0,0 +1,132 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from html.parser import HTMLParser
+
+import requests
+
+from atomic import atomic_write
+from http_scrape import TIMEOUT, clean_text, new_session
+
+MAP_FILE = os.path.join("data", "stock_industries.csv")
+MAP_HEADER = ["stock", "industry", "url", "checked"]
+# Company pages show the classification as linked breadcrumbs, broadest first.
+LEVELS = ["Broad Sector", "Sector", "Broad Industry", "Industry"]
+# The screen's Industry facet uses the "Broad Industry" level.
+PREFERRED_LEVELS = ["Broad Industry", "Industry", "Sector", "Broad Sector"]
+RETRY_DAYS = 30
+
+
+class ClassificationParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.levels = {}
+        self.level = None
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "a" and attrs.get("title") in LEVELS and "/market/" in (attrs.get("href") or ""):
+            self.level = attrs["title"]
+            self.text = []
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.level is not None:
+            self.levels.setdefault(self.level, clean_text(self.text))
+            self.level = None
+
+    def handle_data(self, data):
+        if self.level is not None:
+            self.text.append(data)
+
+
+def parse_classification(html):
+    parser = ClassificationParser()
+    parser.feed(html)
+    parser.close()
+    return parser.levels
+
+
+def choose_industry(levels, known=()):
+    # Prefer whichever level matches a label the Industry facet already uses,
+    # so drill-downs add up against industry_data.csv.
+    for level in PREFERRED_LEVELS:
+        if levels.get(level) and levels[level] in known:
+            return levels[level]
+    for level in PREFERRED_LEVELS:
+        if levels.get(level):
+            return levels[level]
+    return ""
+
+
+def load_mapping(path=MAP_FILE):
+    # {stock: {"industry", "url", "checked"}}; industry is "" when the last
+    # lookup found no classification.
+    mapping = {}
+    if not os.path.isfile(path):
+        return mapping
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("stock"):
+                mapping[row["stock"]] = {field: row.get(field) or "" for field in MAP_HEADER[1:]}
+    return mapping
+
+
+def industry_lookup(mapping):
+    return {stock: entry["industry"] for stock, entry in mapping.items() if entry["industry"]}
+
+
+def save_mapping(mapping, path=MAP_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_write(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(MAP_HEADER)
+        for stock in sorted(mapping):
+            entry = mapping[stock]
+            writer.writerow([stock, entry["industry"], entry["url"], entry["checked"]])
+
+
+def needs_lookup(entry, today):
+    if entry is None:
+        return True
+    if entry["industry"]:
+        return False
+    try:
+        checked = date.fromisoformat(entry["checked"])
+    except ValueError:
+        return True
+    return today - checked >= timedelta(days=RETRY_DAYS)
+
+
+def fetch_classification(session, url):
+    try:
+        response = session.get(url, timeout=TIMEOUT)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return parse_classification(response.text)
+
+
+def refresh_mapping(links, known=(), concurrency=4, today=None, path=MAP_FILE):
+    # Looks up only stocks not in the mapping yet (or whose last lookup came
+    # back empty RETRY_DAYS ago); `links` is {stock: company page url}.
+    # Returns (mapping, number of lookups).
+    today = today or date.today()
+    mapping = load_mapping(path)
+    pending = [(stock, url) for stock, url in links.items() if url and needs_lookup(mapping.get(stock), today)]
+    if not pending:
+        return mapping, 0
+    known = set(known)
+    with new_session(concurrency) as session:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = list(pool.map(lambda item: fetch_classification(session, item[1]), pending))
+    for (stock, url), levels in zip(pending, results):
+        if levels is None:
+            # Network/HTTP failure: leave the stock unseen so the next run retries.
+            continue
+        mapping[stock] = {"industry": choose_industry(levels, known), "url": url, "checked": today.isoformat()}
+    save_mapping(mapping, path)
+    return mapping, len(pending)
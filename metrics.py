@@ -0,0 +1,56 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_FILE = os.path.join("data", "run_metrics.jsonl")
+
+# One report per process run: phase durations (seconds, summed when a phase
+# repeats) and counters such as rows parsed or bytes written.
+current = {"spans": {}, "counters": {}}
+
+
+def record(name, seconds):
+    spans = current["spans"]
+    spans[name] = spans.get(name, 0.0) + seconds
+
+
+def count(name, value=1):
+    counters = current["counters"]
+    counters[name] = counters.get(name, 0) + value
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def run(name, path=REPORT_FILE):
+    # Collects spans/counters for the enclosed block and appends the report as
+    # one JSON line to `path`, also when the block raises.
+    current["spans"] = {}
+    current["counters"] = {}
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield current
+        status = "ok"
+    finally:
+        report = {
+            "run": name,
+            "started": started.isoformat(timespec="seconds"),
+            "status": status,
+            "seconds": round(time.perf_counter() - start, 4),
+            "spans": {key: round(value, 4) for key, value in current["spans"].items()},
+            "counters": current["counters"],
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, sort_keys=True) + "\n")
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import BaseAdapter
+
+INDEX_FILE = "index.json"
+HAR_FILE = "session.har"
+
+
+class FixtureStore:
+    # A directory of recorded page HTML plus index.json mapping each request
+    # URL to its file. Written by --record runs, read back by --replay.
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.index = {}
+        path = os.path.join(directory, INDEX_FILE)
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def save(self, url, body):
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "wb") as f:
+                f.write(body)
+            self.index[url] = name
+            with open(os.path.join(self.directory, INDEX_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=1, sort_keys=True)
+
+    def load(self, url):
+        name = self.index.get(url)
+        if name is None:
+            return None
+        with open(os.path.join(self.directory, name), "rb") as f:
+            return f.read()
+
+    def har_path(self):
+        return os.path.join(self.directory, HAR_FILE)
+
+
+class ReplayAdapter(BaseAdapter):
+    # Serves requests from a FixtureStore; unknown URLs get a 404, so a
+    # replay never touches the network.
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, **kwargs):
+        body = self.store.load(request.url)
+        response = requests.Response()
+        response.status_code = 200 if body is not None else 404
+        response._content = body if body is not None else b""
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def record_session(session, store):
+    # Saves every successful response body under the URL it was asked for.
+    def hook(response, *args, **kwargs):
+        if response.status_code == 200:
+            store.save(response.request.url, response.content)
+    session.hooks["response"].append(hook)
+    return session
+
+
+def replay_session(session, store):
+    adapter = ReplayAdapter(store)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+async def record_route(store, route):
+    # Browser side of --record: documents are fetched, saved and passed on.
+    if route.request.resource_type != "document":
+        await route.fallback()
+        return
+    response = await route.fetch()
+    if response.status == 200:
+        store.save(route.request.url, await response.body())
+    await route.fulfill(response=response)
+
+
+async def replay_route(store, route):
+    # Browser side of --replay without a HAR: recorded documents only.
+    body = store.load(route.request.url) if route.request.resource_type == "document" else None
+    if body is None:
+        await route.abort()
+        return
+    await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=body)
@@ -0,0 +1,61 @@
+import asyncio
+import random
+import time
+
+import metrics
+
+# Attempts per operation, and seconds of backoff each phase may spend in
+# total over a run, so one flaky phase cannot stall the whole scrape.
+ATTEMPTS = {"goto": 3, "page": 4, "industry": 3, "http": 3}
+PHASE_BUDGETS = {"goto": 60.0, "page": 120.0, "industry": 60.0, "http": 30.0}
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+
+def new_budgets():
+    return dict(PHASE_BUDGETS)
+
+
+def backoff_delay(attempt):
+    # Exponential with jitter: ~1s, 2s, 4s, ... capped at BACKOFF_MAX.
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def next_delay(phase, budgets, attempt, error):
+    # Seconds to wait before the next attempt, or None to give up.
+    if attempt + 1 >= ATTEMPTS[phase]:
+        return None
+    delay = backoff_delay(attempt)
+    if budgets[phase] < delay:
+        return None
+    budgets[phase] -= delay
+    metrics.count(f"retries_{phase}")
+    print(f"Retrying {phase} in {delay:.1f}s after: {error}")
+    return delay
+
+
+async def retry_async(phase, budgets, func, retry_on=(Exception,)):
+    # `func(attempt)` returns an awaitable; it is retried on `retry_on`.
+    attempt = 0
+    while True:
+        try:
+            return await func(attempt)
+        except retry_on as e:
+            delay = next_delay(phase, budgets, attempt, e)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def retry_sync(phase, budgets, func, retry_on=(Exception,)):
+    attempt = 0
+    while True:
+        try:
+            return func(attempt)
+        except retry_on as e:
+            delay = next_delay(phase, budgets, attempt, e)
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
@@ -1,110 +1,572 @@
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 from datetime import date
-import csv
+from functools import partial
+import argparse
+import asyncio
 import os
-URL = "https://www.screener.in/screens/3405656/daily-top-gainers/"
+import re
+import time
+
+import metrics
+from checkpoint import clear_checkpoint, is_complete, load_checkpoint, missing_pages, new_state, ordered_tables, save_checkpoint
+from csv_store import dedupe_csv, stored_dates, write_day
+from http_scrape import FallbackRequired, fetch_screen, with_page
+from industry_map import MAP_FILE, refresh_mapping
+from replay import FixtureStore, record_route, record_session, replay_route, replay_session
+from retry import new_budgets, retry_async
+from screens import DEFAULT_SCREEN, STOCK_COLUMNS, select_screens
+from sqlite_store import append_day, open_synced
+from trading_calendar import closed_reason, is_trading_day
 TODAY = date.today().isoformat()
-DATA_FILE = "data/industry_data.csv"
-STOCKS_FILE = "data/stocks_data.csv"
+# One round-trip per page: header labels plus every row's cell texts.
+EXTRACT_TABLE_JS = """
+table => {
+    const result = {headers: [], rows: []};
+    for (const tr of table.querySelectorAll('tr')) {
+        const cells = tr.querySelectorAll('td');
+        if (cells.length < 2) {
+            const ths = tr.querySelectorAll('th');
+            if (ths.length && !result.headers.length) {
+                result.headers = Array.from(ths, th => th.innerText.trim());
+            }
+            continue;
+        }
+        const link = cells[1].querySelector('a');
+        result.rows.push({
+            name: (link || cells[1]).innerText.trim(),
+            cells: Array.from(cells, td => td.innerText.trim()),
+            url: link ? link.href : '',
+        });
+    }
+    return result;
+}
+"""
+EXTRACT_TEXT_JS = "elements => elements.map(e => e.innerText.trim())"
+# Highest page number offered by the pagination links (or "page X of Y"
+# text) and the screen's own "N results found" total.
+SCREEN_INFO_JS = """
+() => {
+    let count = 1;
+    let paged = false;
+    for (const a of document.querySelectorAll('a[href*="page="]')) {
+        const match = a.href.match(/[?&]page=(\\d+)/);
+        if (match) {
+            paged = true;
+            count = Math.max(count, parseInt(match[1], 10));
+        }
+    }
+    const body = document.body.innerText;
+    const text = body.match(/page\\s+\\d+\\s+of\\s+(\\d+)/i);
+    if (text) {
+        paged = true;
+        count = Math.max(count, parseInt(text[1], 10));
+    }
+    const results = body.match(/(\\d[\\d,]*)\\s+results?\\s+found/i);
+    return {pages: count, paged: paged, results: results ? parseInt(results[1].replace(/,/g, ''), 10) : null};
+}
+"""
+# Table body text and page number before a Next click; the wait below resolves
+# as soon as the page number advances or a new table body is rendered.
+TABLE_STATE_JS = """
+() => {
+    const body = document.querySelector('table tbody');
+    const page = new URLSearchParams(location.search).get('page') || '1';
+    return {text: body ? body.innerText : '', page: parseInt(page, 10)};
+}
+"""
+PAGE_ADVANCED_JS = """
+previous => {
+    const body = document.querySelector('table tbody');
+    if (!body || !body.querySelector('td')) return false;
+    const page = parseInt(new URLSearchParams(location.search).get('page') || '1', 10);
+    return body.innerText !== previous.text || page > previous.page;
+}
+"""
+MENU_LABELS = "div[role='menu'] label"
+CHECKBOX_LABELS = "label:has(input[type='checkbox'])"
+DEFAULT_CONCURRENCY = 4
+# Upper bounds (ms) for each event wait; the waits themselves return as soon
+# as their condition holds.
+WAIT_LIMITS = {"goto": 60000, "table": 15000, "page_change": 15000, "menu": 15000}
+BLOCKED_RESOURCES = {"image", "font", "media"}
+BLOCKED_HOSTS = re.compile(r"google-analytics|googletagmanager|doubleclick|facebook|hotjar|clarity\.ms", re.I)
 os.makedirs("data", exist_ok=True)
-def scrape():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120 Safari/537.36"
-            )
-        )
-        page = context.new_page()
-        
+class PartialScrape(Exception):
+    pass
+def clean_number(text):
+    value = (text or "").replace(",", "").replace("%", "").strip()
+    try:
+        float(value)
+    except ValueError:
+        return ""
+    return value
+def parse_stock_table(table, columns=STOCK_COLUMNS):
+    headers = table.get("headers", [])
+    positions = {}
+    for column, pattern in columns:
+        for i, header in enumerate(headers):
+            if pattern.search(header) and i not in positions.values():
+                positions[column] = i
+                break
+    rows = []
+    for row in table.get("rows", []):
+        if not row["name"]:
+            continue
+        cells = row["cells"]
+        values = [
+            clean_number(cells[positions[column]]) if column in positions and positions[column] < len(cells) else ""
+            for column, _ in columns
+        ]
+        rows.append([TODAY, row["name"]] + values)
+    return rows
+def parse_stock_links(tables):
+    # {stock: company page url} for the industry mapping lookups.
+    links = {}
+    for table in tables:
+        for row in table.get("rows", []):
+            if row["name"] and row.get("url"):
+                links.setdefault(row["name"], row["url"])
+    return links
+def parse_industry_labels(labels):
+    rows = []
+    for text in labels:
+        if "-" in text:
+            industry, count = text.rsplit("-", 1)
+            rows.append([TODAY, industry.strip(), int(count.strip())])
+    return rows
+async def block_noise(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCES or BLOCKED_HOSTS.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+async def timed_wait(waits, kind, name, awaitable):
+    # `kind` (goto, rows, page_change, industry_button, industry_labels)
+    # groups the durations in the run report as wait_<kind> spans/counters.
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        seconds = time.perf_counter() - start
+        waits.append((name, seconds))
+        metrics.record(f"wait_{kind}", seconds)
+        metrics.count(f"wait_{kind}")
+async def fetch_table_page(context, url, semaphore, limits, waits):
+    async with semaphore:
+        page = await context.new_page()
         try:
-            page.goto(URL, wait_until="networkidle", timeout=60000)
-        except Exception as e:
-            browser.close()
-            raise Exception(f"Failed to load page: {str(e)}")
-        
-        stocks_rows = []
+            await timed_wait(waits, "goto", f"goto {url}", page.goto(url, wait_until="domcontentloaded", timeout=limits["goto"]))
+            await timed_wait(waits, "rows", f"rows {url}", page.wait_for_selector("table tbody tr", timeout=limits["table"]))
+            return await page.locator("table").first.evaluate(EXTRACT_TABLE_JS)
+        finally:
+            await page.close()
+async def scrape_screen_browser(context, screen, semaphore, concurrency, limits, waits, budgets, state, persist):
+    # One screen inside a shared browser context. Every page load holds a
+    # slot of `semaphore`, so all screens together stay within the bound.
+    # Finished pages and labels go into `state` and `persist()` writes it
+    # out, so a retried run only loads what is still missing.
+    url = screen["url"]
+    name = screen["name"]
+    pages = state["pages"]
+    page = await context.new_page()
+    current = [None]
+    
+    async def open_first(attempt):
+        async with semaphore:
+            await timed_wait(waits, "goto", f"{name} goto", page.goto(url, wait_until="domcontentloaded", timeout=limits["goto"]))
+            await timed_wait(waits, "rows", f"{name} rows", page.wait_for_selector("table tbody tr", timeout=limits["table"]))
+            table = await page.locator("table").first.evaluate(EXTRACT_TABLE_JS)
+            info = await page.evaluate(SCREEN_INFO_JS)
+        current[0] = 1
+        return table, info
+    
+    async def load_serial(number, attempt):
+        # Next click from the previous page; a retry or a resume jumps
+        # straight to the page URL instead.
+        async with semaphore:
+            next_button = page.locator("a:has-text('Next')").first
+            if attempt == 0 and current[0] == number - 1 and await next_button.count() > 0 and await next_button.is_visible():
+                previous = await page.evaluate(TABLE_STATE_JS)
+                current[0] = None
+                await next_button.click()
+                await timed_wait(waits, "page_change", f"{name} page {number}", page.wait_for_function(
+                    PAGE_ADVANCED_JS, arg=previous, timeout=limits["page_change"]
+                ))
+            else:
+                current[0] = None
+                await timed_wait(waits, "goto", f"{name} goto {number}", page.goto(with_page(url, number), wait_until="domcontentloaded", timeout=limits["goto"]))
+                await timed_wait(waits, "rows", f"{name} rows {number}", page.wait_for_selector("table tbody tr", timeout=limits["table"]))
+            table = await page.locator("table").first.evaluate(EXTRACT_TABLE_JS)
+        current[0] = number
+        return table
+    
+    async def next_after_last(attempt):
+        # Puts the main tab on the last known page and reports whether it
+        # still offers a Next link.
+        async with semaphore:
+            last = state["page_count"]
+            if attempt or current[0] != last:
+                current[0] = None
+                await timed_wait(waits, "goto", f"{name} goto {last}", page.goto(with_page(url, last), wait_until="domcontentloaded", timeout=limits["goto"]))
+                await timed_wait(waits, "rows", f"{name} rows {last}", page.wait_for_selector("table tbody tr", timeout=limits["table"]))
+                current[0] = last
+            next_button = page.locator("a:has-text('Next')").first
+            return await next_button.count() > 0 and await next_button.is_visible()
+    
+    async def load_tab(number):
+        table = await retry_async("page", budgets, lambda attempt: fetch_table_page(
+            context, with_page(url, number), semaphore, limits, waits
+        ))
+        pages[str(number)] = table
+        persist()
+        metrics.count("pages")
+    
+    async def read_labels(attempt):
+        async with semaphore:
+            if attempt or current[0] is None:
+                current[0] = None
+                await timed_wait(waits, "goto", f"{name} reload", page.goto(url, wait_until="domcontentloaded", timeout=limits["goto"]))
+                current[0] = 1
+            await timed_wait(waits, "industry_button", f"{name} industry button", page.wait_for_selector("button:has-text('Industry')", timeout=limits["menu"]))
+            await page.click("button:has-text('Industry')")
+            await timed_wait(waits, "industry_labels", f"{name} industry labels", page.wait_for_selector(
+                f"{MENU_LABELS}, {CHECKBOX_LABELS}", timeout=limits["menu"]
+            ))
+            labels = await page.eval_on_selector_all(MENU_LABELS, EXTRACT_TEXT_JS)
+            if not labels:
+                labels = await page.eval_on_selector_all(CHECKBOX_LABELS, EXTRACT_TEXT_JS)
+        if not parse_industry_labels(labels):
+            raise Exception("industry menu had no labels with counts")
+        return labels
+    
+    try:
         try:
-            page.wait_for_selector("table", timeout=15000)
-            
-            while True:
-                table = page.locator("table").first
-                rows = table.locator("tbody tr").all()
-                
-                for row in rows:
-                    cells = row.locator("td").all()
-                    if len(cells) >= 2:
-                        name_cell = cells[1]
-                        link = name_cell.locator("a").first
-                        stock_name = link.inner_text().strip() if link.count() > 0 else name_cell.inner_text().strip()
-                        
-                        if stock_name:
-                            stocks_rows.append([TODAY, stock_name])
-                
-                next_button = page.locator("a:has-text('Next')").first
-                if next_button.count() > 0 and next_button.is_visible():
-                    next_button.click()
-                    page.wait_for_load_state("networkidle")
-                    page.wait_for_timeout(1000)
-                else:
-                    break
-                    
+            with metrics.span("goto"):
+                table, info = await retry_async("goto", budgets, open_first)
         except Exception as e:
-            page.screenshot(path="debug_stocks_screenshot.png")
-            print(f"Warning: Could not scrape stocks table: {str(e)}")
+            raise Exception(f"Failed to load {url}: {str(e)}")
+        if "1" not in pages:
+            pages["1"] = table
+            metrics.count("pages")
+        # A resumed run keeps pages an earlier Next walk found past the count.
+        state.update(page_count=max(info["pages"], state["page_count"] or 0), result_count=info["results"])
+        persist()
         
-        industry_rows = []
+        pagination_start = time.perf_counter()
         try:
-            page.wait_for_selector("button:has-text('Industry')", timeout=15000)
-            page.click("button:has-text('Industry')")
-            
-            page.wait_for_timeout(2000)
-            
-            try:
-                page.wait_for_selector("div[role='menu'] label", timeout=15000)
-                items = page.locator("div[role='menu'] label").all()
-            except:
-                page.wait_for_selector("label input[type='checkbox']", timeout=15000)
-                items = page.locator("label:has(input[type='checkbox'])").all()
-            
-            for item in items:
-                text = item.inner_text().strip()
-                if "-" in text:
-                    industry, count = text.rsplit("-", 1)
-                    industry_rows.append([TODAY, industry.strip(), int(count.strip())])
-            
+            missing = missing_pages(state)
+            if concurrency > 1 and missing:
+                # Missing pages load side by side in extra tabs; each is
+                # checkpointed as soon as it arrives.
+                results = await asyncio.gather(*(load_tab(number) for number in missing), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, Exception)]
+                if errors:
+                    raise errors[0]
+            else:
+                for number in missing:
+                    pages[str(number)] = await retry_async("page", budgets, lambda attempt: load_serial(number, attempt))
+                    persist()
+                    metrics.count("pages")
+            # The page count comes from page links or "page X of Y"; when
+            # neither was found there is also nothing reliable to check the
+            # row count against, so keep clicking Next while it is shown.
+            # The serial path is already on the last page and checks too.
+            if not info["paged"] or info["results"] is None or current[0] == state["page_count"]:
+                while await retry_async("page", budgets, next_after_last):
+                    number = state["page_count"] + 1
+                    table = await retry_async("page", budgets, lambda attempt: load_serial(number, attempt))
+                    if not table["rows"]:
+                        break
+                    pages[str(number)] = table
+                    state["page_count"] = number
+                    persist()
+                    metrics.count("pages")
+                    metrics.count("pages_past_count")
         except Exception as e:
-            page.screenshot(path="debug_screenshot.png")
-            browser.close()
-            raise Exception(f"Failed to scrape industry data: {str(e)}")
-        
-        browser.close()
+            await page.screenshot(path=f"debug_{name}_stocks_screenshot.png")
+            raise Exception(f"Could not scrape stocks table of {name} ({len(pages)}/{state['page_count']} pages checkpointed): {str(e)}")
+        finally:
+            metrics.record("pagination", time.perf_counter() - pagination_start)
         
-        if not industry_rows:
-            raise Exception("No industry data found on the page")
+        if state["labels"] is None:
+            industry_start = time.perf_counter()
+            try:
+                state["labels"] = await retry_async("industry", budgets, read_labels)
+                persist()
+            except Exception as e:
+                await page.screenshot(path=f"debug_{name}_screenshot.png")
+                raise Exception(f"Failed to scrape industry data of {name}: {str(e)}")
+            finally:
+                metrics.record("industry_menu", time.perf_counter() - industry_start)
+    finally:
+        await page.close()
+async def scrape_browser(screens, concurrency=DEFAULT_CONCURRENCY, limits=WAIT_LIMITS, budgets=None, states=None, persist=None, record=None, replay=None):
+    # All screens share one browser launch and one context (and so its
+    # cookies, cache and request blocking). Fills states[screen name] and
+    # returns {screen name: None or the exception that screen raised}.
+    # `record`/`replay` are FixtureStores: recording saves a HAR plus each
+    # document, replaying serves the HAR (or the documents) with no network.
+    budgets = budgets if budgets is not None else new_budgets()
+    states = states if states is not None else {}
+    persist = persist or (lambda screen: None)
+    waits = []
+    async with async_playwright() as p:
+        with metrics.span("browser_launch"):
+            browser = await p.chromium.launch(
+                headless=True,
+                args=["--disable-blink-features=AutomationControlled"]
+            )
+            context = await browser.new_context(
+                viewport={"width": 1280, "height": 800},
+                user_agent=(
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/120 Safari/537.36"
+                ),
+                **({"record_har_path": record.har_path()} if record else {})
+            )
+            await context.route("**/*", block_noise)
+            # Later routes run first: recording sees documents before
+            # block_noise does, a replay answers every request itself.
+            if record:
+                await context.route("**/*", partial(record_route, record))
+            elif replay and os.path.isfile(replay.har_path()):
+                await context.route_from_har(replay.har_path(), not_found="abort")
+            elif replay:
+                await context.route("**/*", partial(replay_route, replay))
         
-        file_exists = os.path.isfile(DATA_FILE)
-        with open(DATA_FILE, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(["date", "industry", "count"])
-            writer.writerows(industry_rows)
+        try:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            results = await asyncio.gather(*(
+                scrape_screen_browser(
+                    context, screen, semaphore, concurrency, limits, waits, budgets,
+                    states.setdefault(screen["name"], new_state(screen)),
+                    lambda screen=screen: persist(screen),
+                )
+                for screen in screens
+            ), return_exceptions=True)
+        finally:
+            # Closing the context first writes out a recorded HAR.
+            await context.close()
+            await browser.close()
+        metrics.count("waits", len(waits))
+        metrics.record("waits_total", sum(seconds for _, seconds in waits))
+        if waits:
+            slowest, longest = max(waits, key=lambda wait: wait[1])
+            print(f"Waits: {len(waits)}, {sum(seconds for _, seconds in waits):.2f}s total, slowest {longest:.2f}s ({slowest})")
+        return {screen["name"]: result for screen, result in zip(screens, results)}
+def scrape_http(screen, concurrency=DEFAULT_CONCURRENCY, budgets=None, state=None, prepare_session=None):
+    state = state if state is not None else new_state(screen)
+    with metrics.span("http_fetch"):
+        fetch_screen(screen["url"], concurrency, state, budgets, prepare_session)
+    if not parse_industry_labels(state["labels"]):
+        raise FallbackRequired("industry facet labels had no counts")
+def screen_rows(screen, state):
+    # (stock rows, industry rows, links) from a complete checkpoint state.
+    tables = ordered_tables(state)
+    stocks_rows = []
+    for table in tables:
+        stocks_rows.extend(parse_stock_table(table, screen["columns"]))
+    return stocks_rows, parse_industry_labels(state["labels"]), parse_stock_links(tables)
+def check_complete(screen, stocks_rows, state):
+    # The screen reports how many results it found; fewer rows than that
+    # means pages were cut short or lost.
+    expected = state["result_count"]
+    if expected is not None and len(stocks_rows) < expected:
+        metrics.count("partial_scrapes")
+        raise PartialScrape(f"{screen['name']}: got {len(stocks_rows)} of {expected} reported results")
+def file_size(path):
+    return os.path.getsize(path) if os.path.isfile(path) else 0
+def save_rows(screen, stocks_rows, industry_rows, replace=False):
+    metrics.count("stock_rows", len(stocks_rows))
+    metrics.count("industry_rows", len(industry_rows))
+    if not industry_rows:
+        raise Exception(f"No industry data found on the {screen['name']} page")
+    
+    industry_file = screen["industry_file"]
+    stocks_file = screen["stocks_file"]
+    # The optional SQLite copy only follows along while it matches the CSVs.
+    db = open_synced(screen)
+    written_industries = []
+    written_stocks = []
+    with metrics.span("write"):
+        size = file_size(industry_file)
+        if write_day(industry_file, ["date", "industry", "count"], TODAY, industry_rows, replace=replace):
+            metrics.count("bytes_written", file_size(industry_file) - size)
+            written_industries = industry_rows
+            print(f"Saved {len(industry_rows)} industries to {industry_file}")
+        else:
+            print(f"{industry_file} already has rows for {TODAY}, skipped")
         
         if stocks_rows:
-            stocks_exists = os.path.isfile(STOCKS_FILE)
-            with open(STOCKS_FILE, "a", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                if not stocks_exists:
-                    writer.writerow(["date", "stock"])
-                writer.writerows(stocks_rows)
-            print(f"Saved {len(stocks_rows)} stocks to {STOCKS_FILE}")
-        
-        print(f"Saved {len(industry_rows)} industries to {DATA_FILE}")
+            size = file_size(stocks_file)
+            if write_day(stocks_file, screen["stocks_header"], TODAY, stocks_rows, replace=replace):
+                metrics.count("bytes_written", file_size(stocks_file) - size)
+                written_stocks = stocks_rows
+                print(f"Saved {len(stocks_rows)} stocks to {stocks_file}")
+            else:
+                print(f"{stocks_file} already has rows for {TODAY}, skipped")
+    
+    if db is not None:
+        try:
+            with metrics.span("sqlite_write"):
+                append_day(db, screen, TODAY, written_stocks, written_industries, replace=replace)
+            print(f"Saved {len(written_stocks)} stocks and {len(written_industries)} industries to {screen['db_file']}")
+        finally:
+            db.close()
+def update_industry_map(links, industry_rows, concurrency=DEFAULT_CONCURRENCY):
+    # Best effort: a failed lookup only leaves the stock as N/A until next run.
+    try:
+        with metrics.span("industry_map"):
+            mapping, lookups = refresh_mapping(links, [row[1] for row in industry_rows], concurrency)
+    except Exception as e:
+        print(f"Warning: Could not update {MAP_FILE}: {str(e)}")
+        return
+    metrics.count("industry_lookups", lookups)
+    if lookups:
+        print(f"Looked up {lookups} new stocks, {len(mapping)} mapped in {MAP_FILE}")
+def scrape(replace=False, concurrency=DEFAULT_CONCURRENCY, mode="auto", limits=WAIT_LIMITS, screens=None, allow_partial=False, record=None, replay=None):
+    # HTTP first for every screen; the ones that need a real browser are then
+    # scraped together in a single Playwright launch. Progress is
+    # checkpointed per screen, so re-running after a failure only loads the
+    # pages that are still missing. With `record` (a FixtureStore) every page
+    # is also saved as a fixture; with `replay` the fixtures are scraped
+    # instead of the site, as a dry run that leaves data/ and checkpoints alone.
+    screens = screens or [DEFAULT_SCREEN]
+    budgets = new_budgets()
+    fresh = record is not None or replay is not None
+    states = {screen["name"]: new_state(screen) if fresh else load_checkpoint(screen, TODAY) for screen in screens}
+    prepare_session = None
+    if record:
+        prepare_session = partial(record_session, store=record)
+    elif replay:
+        prepare_session = partial(replay_session, store=replay)
+    
+    def persist(screen):
+        if not replay:
+            save_checkpoint(screen, TODAY, states[screen["name"]])
+    
+    def clear(screen):
+        if not replay:
+            clear_checkpoint(screen, TODAY)
+    
+    errors = {}
+    fallback = []
+    for screen in screens:
+        state = states[screen["name"]]
+        if state["pages"]:
+            metrics.count("resumed_screens")
+            print(f"Resuming {screen['name']} from checkpoint ({len(state['pages'])}/{state['page_count']} pages)")
+        if is_complete(state):
+            continue
+        if mode == "browser":
+            fallback.append(screen)
+            continue
+        try:
+            scrape_http(screen, concurrency, budgets, state, prepare_session)
+        except FallbackRequired as e:
+            persist(screen)
+            if mode == "http":
+                errors[screen["name"]] = e
+                continue
+            print(f"HTTP scrape of {screen['name']} unavailable ({e}), falling back to Playwright")
+            metrics.count("browser_fallback")
+            fallback.append(screen)
+    if fallback:
+        results = asyncio.run(scrape_browser(fallback, concurrency, limits, budgets, states, persist, record, replay))
+        errors.update({name: result for name, result in results.items() if result is not None})
+    
+    failures = []
+    links = {}
+    labels = []
+    for screen in screens:
+        name = screen["name"]
+        try:
+            if name in errors:
+                raise errors[name]
+            stocks_rows, industry_rows, screen_links = screen_rows(screen, states[name])
+            if not allow_partial:
+                check_complete(screen, stocks_rows, states[name])
+            if replay:
+                print(f"Replayed {name}: {len(stocks_rows)} stocks, {len(industry_rows)} industries")
+            else:
+                save_rows(screen, stocks_rows, industry_rows, replace=replace)
+        except PartialScrape as e:
+            # Every page loaded but rows are missing: start over next time.
+            print(f"Error: {str(e)}")
+            clear(screen)
+            failures.append(name)
+            continue
+        except Exception as e:
+            print(f"Error: {name}: {str(e)} (checkpoint kept for the next run)")
+            persist(screen)
+            failures.append(name)
+            continue
+        clear(screen)
+        for stock, url in screen_links.items():
+            links.setdefault(stock, url)
+        labels.extend(industry_rows)
+    if not replay:
+        update_industry_map(links, labels, concurrency)
+    if failures:
+        raise Exception(f"Scrape failed for: {', '.join(failures)}")
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true", help="scrape even on weekends and NSE holidays")
+    parser.add_argument("--replace", action="store_true", help="overwrite rows already stored for today")
+    parser.add_argument("--dedupe", action="store_true", help="drop duplicate and non-trading-day rows, then exit")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="pages loaded in parallel across all screens (1 = click through Next serially)")
+    parser.add_argument("--wait-limit", type=int, help="upper bound in ms for each table/menu wait")
+    parser.add_argument("--mode", choices=["auto", "http", "browser"], default="auto", help="auto tries plain HTTP first and falls back to Playwright")
+    parser.add_argument("--screen", action="append", help="only this registered screen (repeatable; default: all)")
+    parser.add_argument("--allow-partial", action="store_true", help="save even when fewer rows than the screen's reported result count were scraped")
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument("--record", metavar="DIR", help="also save every fetched page (and a HAR in the browser) to DIR as replay fixtures")
+    fixtures.add_argument("--replay", metavar="DIR", help="scrape fixtures recorded with --record instead of the site; saves nothing")
+    args = parser.parse_args()
+    
+    try:
+        screens = select_screens(args.screen)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.dedupe:
+        for screen in screens:
+            print(f"Removed {dedupe_csv(screen['industry_file'], ['industry'])} rows from {screen['industry_file']}")
+            print(f"Removed {dedupe_csv(screen['stocks_file'], ['stock'])} rows from {screen['stocks_file']}")
+        return
+    
+    limits = dict(WAIT_LIMITS)
+    if args.wait_limit:
+        limits.update(table=args.wait_limit, page_change=args.wait_limit, menu=args.wait_limit)
+    
+    if args.replay:
+        if not os.path.isdir(args.replay):
+            parser.error(f"no fixtures directory {args.replay}")
+        scrape(concurrency=args.concurrency, mode=args.mode, limits=limits, screens=screens, allow_partial=args.allow_partial, replay=FixtureStore(args.replay))
+        return
+    
+    today = date.fromisoformat(TODAY)
+    if not args.force and not is_trading_day(today):
+        print(f"Market closed on {TODAY} ({closed_reason(today)}), nothing to scrape")
+        return
+    
+    if not args.replace:
+        pending = [
+            screen for screen in screens
+            if not (TODAY in stored_dates(screen["industry_file"]) and TODAY in stored_dates(screen["stocks_file"]))
+        ]
+        for screen in screens:
+            if screen not in pending:
+                print(f"Data for {TODAY} already stored for {screen['name']} (use --replace to overwrite)")
+        if not pending:
+            return
+        screens = pending
+    
+    record = FixtureStore(args.record) if args.record else None
+    if record:
+        os.makedirs(args.record, exist_ok=True)
+    with metrics.run("scrape"):
+        scrape(replace=args.replace, concurrency=args.concurrency, mode=args.mode, limits=limits, screens=screens, allow_partial=args.allow_partial, record=record)
 if __name__ == "__main__":
-    scrape()
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+
+import metrics
+import scrape
+from checkpoint import new_state
+from http_scrape import parse_screen_html
+from replay import FixtureStore, replay_session
+from screens import SCREENS
+
+DEFAULT_FIXTURES = os.path.join("fixtures", "screener")
+
+
+def reset_metrics():
+    metrics.current["spans"] = {}
+    metrics.current["counters"] = {}
+
+
+def fixture_pages(store):
+    return [store.load(url) for url in sorted(store.index)]
+
+
+def bench_parse(store, repeat):
+    # Extraction only: HTML parsing plus row/label conversion, no I/O.
+    bodies = fixture_pages(store)
+    size = sum(len(body) for body in bodies)
+    texts = [body.decode("utf-8") for body in bodies]
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = 0
+        for text in texts:
+            page = parse_screen_html(text)
+            rows += len(scrape.parse_stock_table(page["table"]))
+            scrape.parse_industry_labels(page["labels"])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": round(best, 4),
+        "pages": len(texts),
+        "rows": rows,
+        "pages_per_second": round(len(texts) / best, 1),
+        "rows_per_second": round(rows / best, 1),
+        "mb_per_second": round(size / 1e6 / best, 2),
+    }
+
+
+def replay_screens(store):
+    return [screen for screen in SCREENS if screen["url"] in store.index]
+
+
+def bench_http(store, repeat, concurrency):
+    # A whole HTTP scrape against the fixtures, with the per-phase spans
+    # scrape.py reports in run_metrics.jsonl.
+    best = None
+    for _ in range(repeat):
+        reset_metrics()
+        rows = 0
+        start = time.perf_counter()
+        for screen in replay_screens(store):
+            state = new_state(screen)
+            scrape.scrape_http(screen, concurrency, state=state, prepare_session=lambda session: replay_session(session, store))
+            with metrics.span("parse_rows"):
+                rows += len(scrape.screen_rows(screen, state)[0])
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best["seconds"]:
+            best = {"seconds": round(elapsed, 4), "rows": rows, "spans": dict(metrics.current["spans"])}
+    best["rows_per_second"] = round(best["rows"] / best["seconds"], 1) if best["seconds"] else None
+    best["spans"] = {name: round(seconds, 4) for name, seconds in best["spans"].items()}
+    return best
+
+
+def bench_browser(store, concurrency):
+    # Needs a Playwright Chromium; replays the HAR when one was recorded.
+    reset_metrics()
+    screens = replay_screens(store)
+    start = time.perf_counter()
+    results = asyncio.run(scrape.scrape_browser(screens, concurrency, replay=store))
+    elapsed = time.perf_counter() - start
+    errors = {name: str(error) for name, error in results.items() if error is not None}
+    return {
+        "seconds": round(elapsed, 4),
+        "errors": errors,
+        "spans": {name: round(seconds, 4) for name, seconds in metrics.current["spans"].items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrape extraction against recorded fixtures (no network)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="directory written by scrape.py --record")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per step; the fastest is kept")
+    parser.add_argument("--concurrency", type=int, default=scrape.DEFAULT_CONCURRENCY)
+    parser.add_argument("--browser", action="store_true", help="also replay through Playwright")
+    parser.add_argument("--output", default="scrape_bench_results.json")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    if not store.index:
+        parser.error(f"no fixtures in {args.fixtures}")
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "fixtures": args.fixtures,
+        "results": {
+            "parse": bench_parse(store, args.repeat),
+            "http_replay": bench_http(store, args.repeat, args.concurrency),
+        },
+    }
+    if args.browser:
+        report["results"]["browser_replay"] = bench_browser(store, args.concurrency)
+
+    for name, result in report["results"].items():
+        rate = f"  {result['rows_per_second']:10.1f} rows/s" if result.get("rows_per_second") else ""
+        print(f"{name:16s} {result['seconds']:9.4f}s{rate}")
+        for span, seconds in result.get("spans", {}).items():
+            print(f"  {span:30s} {seconds:9.4f}s")
+        for screen, error in result.get("errors", {}).items():
+            print(f"  {screen}: {error}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
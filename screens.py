@@ -0,0 +1,55 @@
+import os
+import re
+
+# Columns pulled from a screen's results table, matched against its headers.
+STOCK_COLUMNS = [
+    ("price", re.compile(r"^cmp", re.I)),
+    ("change_pct", re.compile(r"chg|change|return", re.I)),
+    ("market_cap", re.compile(r"mar\s*cap", re.I)),
+]
+
+
+def make_screen(name, url, title, columns=STOCK_COLUMNS, prefix=""):
+    # Every screen gets its own CSVs, aggregate state, build cache, column
+    # store and export, optional SQLite copy and dashboard directory; an empty prefix keeps the original file names.
+    def data_path(base):
+        return os.path.join("data", f"{prefix}_{base}" if prefix else base)
+
+    return {
+        "name": name,
+        "url": url,
+        "title": title,
+        "columns": columns,
+        "stocks_header": ["date", "stock"] + [column for column, _ in columns],
+        "stocks_file": data_path("stocks_data.csv"),
+        "industry_file": data_path("industry_data.csv"),
+        "state_file": data_path("aggregate_state.json"),
+        "cache_file": data_path("build_cache.json"),
+        "export_dir": data_path("columns"),
+        "store_dir": data_path("column_store"),
+        "db_file": data_path("history.sqlite"),
+        "docs_dir": os.path.join("docs", prefix) if prefix else "docs",
+    }
+
+
+# To track another Screener screen, append
+#     make_screen("top-losers", "https://www.screener.in/screens/<id>/<slug>/", "Top Losers", prefix="losers")
+# and both scrape.py and generate_dashboard.py pick it up.
+SCREENS = [
+    make_screen(
+        "top-gainers",
+        "https://www.screener.in/screens/3405656/daily-top-gainers/",
+        "Top Gainers",
+    ),
+]
+DEFAULT_SCREEN = SCREENS[0]
+
+
+def select_screens(names=None):
+    if not names:
+        return list(SCREENS)
+    by_name = {screen["name"]: screen for screen in SCREENS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"unknown screen(s): {', '.join(unknown)}; known: {', '.join(by_name)}")
+    return [by_name[name] for name in names]
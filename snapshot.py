@@ -0,0 +1,258 @@
+import csv
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+from datetime import date
+
+import metrics
+from aggregate import bucket_rows, parse_day
+from atomic import write_atomic
+
+SNAPSHOT_FILE = os.path.join("data", "aggregate_state.json")
+SNAPSHOT_VERSION = 3
+SIGNATURE_BYTES = 4096
+UNDATED = "undated"
+
+
+def csv_signature(path, offset):
+    # Header plus the bytes just before `offset`: any rewrite of the already
+    # processed part of the file (dedupe, manual edits) changes one of them.
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        digest.update(f.read(min(offset, SIGNATURE_BYTES)))
+        f.seek(max(0, offset - SIGNATURE_BYTES))
+        digest.update(f.read(offset - f.tell()))
+    return digest.hexdigest()
+
+
+def segment_dir(path):
+    # Day buckets live next to the state file, one file per dataset and month.
+    return os.path.splitext(path)[0]
+
+
+def month_of(day):
+    return date.fromordinal(day).strftime("%Y-%m") if day is not None else UNDATED
+
+
+def encode_day(day):
+    return "" if day is None else str(day)
+
+
+def decode_day(key):
+    return int(key) if key else None
+
+
+class DayBuckets(Mapping):
+    # {day ordinal (None when undated): {name: [count, first row index]}}
+    # backed by a dataset's month segments. Every day and its number of
+    # names is known up front (`sizes`), but a month's segment is only read
+    # when one of its days is asked for, so a build touches the months it
+    # needs rather than the whole history. Months whose buckets change are
+    # marked dirty for save_snapshot.
+
+    def __init__(self, directory=None, segments=None, sizes=None, days=None):
+        self.directory = directory
+        self.segments = dict(segments or {})
+        self.sizes = dict(sizes or {})
+        self.months = {}
+        self.dirty = set()
+        for day, names in (days or {}).items():
+            self[day] = names
+
+    def month(self, month):
+        days = self.months.get(month)
+        if days is None:
+            days = self.months[month] = {}
+            name = self.segments.get(month)
+            if name is not None:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    days.update((decode_day(key), names) for key, names in json.load(f).items())
+                metrics.count("snapshot_segments_read")
+        return days
+
+    def __getitem__(self, day):
+        if day not in self.sizes:
+            raise KeyError(day)
+        return self.month(month_of(day))[day]
+
+    def __setitem__(self, day, names):
+        self.month(month_of(day))[day] = names
+        self.touch(day)
+
+    def touch(self, day):
+        # Call after changing a bucket in place.
+        self.sizes[day] = len(self.month(month_of(day))[day])
+        self.dirty.add(month_of(day))
+
+    def __contains__(self, day):
+        return day in self.sizes
+
+    def __iter__(self):
+        return iter(self.sizes)
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    # The state file holds each dataset's offsets/signature, the names of its
+    # month segments and its per-day name counts; the segments themselves
+    # are read lazily through DayBuckets. A dataset with a missing segment is
+    # dropped, so the next build reloads it in full.
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get("version") != SNAPSHOT_VERSION:
+        return {}
+    datasets = state.get("datasets", {})
+    directory = segment_dir(path)
+    for key in list(datasets):
+        entry = datasets[key]
+        if "segments" not in entry:
+            continue
+        if not all(os.path.isfile(os.path.join(directory, name)) for name in entry["segments"].values()):
+            del datasets[key]
+            continue
+        sizes = {decode_day(day): size for day, size in entry.pop("sizes").items()}
+        entry["days"] = DayBuckets(directory, entry.pop("segments"), sizes)
+    return datasets
+
+
+def save_snapshot(datasets, path=SNAPSHOT_FILE):
+    # Only dirty months are encoded again. Segment names carry a digest of
+    # their content, so the state file is the single switch-over point and a
+    # crash mid-save leaves the previous snapshot intact; unreferenced
+    # segments are removed afterwards.
+    directory = segment_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    state = {}
+    for key, entry in datasets.items():
+        days = entry.get("days")
+        if days is None:
+            state[key] = entry
+            continue
+        for month in sorted(days.dirty):
+            encoded = {encode_day(day): names for day, names in days.month(month).items()}
+            data = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+            name = f"{key}-{month}-{hashlib.sha1(data).hexdigest()[:12]}.json"
+            if not os.path.isfile(os.path.join(directory, name)):
+                write_atomic(os.path.join(directory, name), data)
+                metrics.count("snapshot_bytes_written", len(data))
+            days.segments[month] = name
+        days.directory = directory
+        days.dirty.clear()
+        state[key] = {field: value for field, value in entry.items() if field != "days"}
+        state[key]["segments"] = days.segments
+        state[key]["sizes"] = {encode_day(day): size for day, size in days.sizes.items()}
+    data = json.dumps({"version": SNAPSHOT_VERSION, "datasets": state}, separators=(",", ":")).encode("utf-8")
+    write_atomic(path, data)
+    metrics.count("snapshot_bytes_written", len(data))
+    referenced = {name for entry in state.values() for name in entry.get("segments", {}).values()}
+    for name in os.listdir(directory):
+        if name.endswith(".json") and name not in referenced:
+            os.remove(os.path.join(directory, name))
+
+
+def is_fresh(entry, csv_path, name_field, count_field):
+    if not entry:
+        return False
+    if entry.get("name_field") != name_field or entry.get("count_field") != count_field:
+        return False
+    offset = entry.get("offset", 0)
+    if offset > os.path.getsize(csv_path):
+        return False
+    return entry.get("signature") == csv_signature(csv_path, offset)
+
+
+def read_fields(csv_path):
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), None)
+
+
+def stream_lines(f, consumed):
+    # Lines straight off an open binary file, one at a time, so a large tail
+    # is never held in memory; consumed[0] tallies the bytes read.
+    for line in f:
+        consumed[0] += len(line)
+        yield line.decode("utf-8")
+
+
+def stream_rows(f, fields, consumed):
+    return csv.DictReader(stream_lines(f, consumed), fieldnames=fields)
+
+
+def update_days(datasets, key, csv_path, name_field, count_field=None, full_rebuild=False, loader=None):
+    # Folds rows appended since the last build into the stored day counters.
+    # Returns (days, row count) and updates `datasets[key]` in place. When the
+    # snapshot can't be used, `loader()` (if given) supplies the full
+    # (days, row count) instead of re-reading the CSV text here.
+    if not os.path.isfile(csv_path):
+        datasets.pop(key, None)
+        return {}, 0
+
+    entry = datasets.get(key)
+    if full_rebuild or not is_fresh(entry, csv_path, name_field, count_field):
+        entry = None
+
+    # `base` identifies the full load this entry grew from; it survives
+    # incremental updates, so derived state (streaks, the window totals
+    # below) can tell whether the history under it was rebuilt.
+    base = entry.get("base") if entry else None
+    if entry:
+        days = entry["days"]
+        rows = entry["rows"]
+        offset = entry["offset"]
+        fields = entry["fields"]
+    elif loader is not None:
+        loaded, rows = loader()
+        days = DayBuckets(days=loaded)
+        offset = os.path.getsize(csv_path)
+        fields = read_fields(csv_path)
+    else:
+        days, rows, offset, fields = DayBuckets(), 0, 0, None
+
+    touched = set()
+
+    def noting(reader):
+        for row in reader:
+            touched.add(row.get("date"))
+            yield row
+
+    consumed = [0]
+    with open(csv_path, "rb") as f:
+        f.seek(offset)
+        reader = stream_rows(f, fields, consumed)
+        days, rows = bucket_rows(noting(reader), name_field, count_field, days, rows)
+        if consumed[0]:
+            fields = reader.fieldnames
+            offset += consumed[0]
+
+    # Appended rows only change the buckets of the days they are dated in.
+    cache = {}
+    touched = {parse_day(value, cache) for value in touched}
+    for day in touched:
+        if day in days:
+            days.touch(day)
+    metrics.count(f"{key}_bytes_read", consumed[0])
+
+    datasets[key] = {
+        "name_field": name_field,
+        "count_field": count_field,
+        "fields": fields,
+        "offset": offset,
+        "rows": rows,
+        "signature": csv_signature(csv_path, offset),
+        "base": base or os.urandom(8).hex(),
+        "days": days,
+    }
+    # Totals of the days before every bounded window (aggregate.update_outer)
+    # stay valid while the new rows are all dated inside those windows.
+    outer = entry.get("outer") if entry else None
+    if outer and not any(day is None or day < outer["through"] for day in touched):
+        datasets[key]["outer"] = outer
+    return days, rows
@@ -0,0 +1,322 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import date
+
+from aggregate import TIMEFRAMES, parse_day, window_starts
+from snapshot import csv_signature
+
+# `seq` is each row's position in its CSV. Rankings break count ties on first
+# appearance, so it keeps SQL results in the same order as the CSV path.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS days (date TEXT PRIMARY KEY, stocks INTEGER NOT NULL DEFAULT 0, industries INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS stocks (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS industries (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS appearances (
+    seq INTEGER PRIMARY KEY,
+    date TEXT,
+    stock_id INTEGER REFERENCES stocks (id){extra_columns}
+);
+CREATE TABLE IF NOT EXISTS industry_counts (
+    seq INTEGER PRIMARY KEY,
+    date TEXT,
+    industry_id INTEGER REFERENCES industries (id),
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS appearances_date ON appearances (date);
+CREATE INDEX IF NOT EXISTS appearances_stock_date ON appearances (stock_id, date);
+CREATE INDEX IF NOT EXISTS industry_counts_date ON industry_counts (date);
+CREATE INDEX IF NOT EXISTS industry_counts_industry_date ON industry_counts (industry_id, date);
+"""
+# Ready-made questions for `python sqlite_store.py --report NAME`.
+REPORTS = {
+    "pairs": """
+        SELECT s1.name, s2.name, COUNT(*) AS days
+        FROM appearances a1
+        JOIN appearances a2 ON a2.date = a1.date AND a2.stock_id > a1.stock_id
+        JOIN stocks s1 ON s1.id = a1.stock_id
+        JOIN stocks s2 ON s2.id = a2.stock_id
+        WHERE a1.date >= :since
+        GROUP BY a1.stock_id, a2.stock_id
+        ORDER BY days DESC, s1.name, s2.name
+        LIMIT :limit
+    """,
+    "industry-weeks": """
+        SELECT strftime('%Y-W%W', c.date) AS week, i.name, SUM(c.count) AS total
+        FROM industry_counts c JOIN industries i ON i.id = c.industry_id
+        WHERE c.date >= :since
+        GROUP BY week, c.industry_id
+        ORDER BY week DESC, total DESC
+        LIMIT :limit
+    """,
+    "stock-history": """
+        SELECT s.name, COUNT(*) AS days, MIN(a.date) AS first_seen, MAX(a.date) AS last_seen
+        FROM appearances a JOIN stocks s ON s.id = a.stock_id
+        WHERE a.date >= :since
+        GROUP BY a.stock_id
+        ORDER BY days DESC, s.name
+        LIMIT :limit
+    """,
+}
+
+
+def extra_columns(screen):
+    return [column for column, _ in screen["columns"]]
+
+
+def connect(screen, create=False):
+    # None when the screen has no database and `create` is not set: the
+    # SQLite backend is opt-in per screen.
+    path = screen["db_file"]
+    if not create and not os.path.isfile(path):
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.format(extra_columns="".join(f",\n    {column} REAL" for column in extra_columns(screen))))
+    return conn
+
+
+def source_state(csv_path):
+    if not os.path.isfile(csv_path):
+        return None
+    size = os.path.getsize(csv_path)
+    return {"size": size, "signature": csv_signature(csv_path, size)}
+
+
+def sources(screen):
+    return {"stocks": source_state(screen["stocks_file"]), "industries": source_state(screen["industry_file"])}
+
+
+def in_sync(conn, screen):
+    # True when the database was last written from exactly the CSVs on disk;
+    # a CSV edited behind its back (dedupe, manual fixes) needs --import.
+    row = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+    return row is not None and json.loads(row[0]) == sources(screen)
+
+
+def mark_synced(conn, screen):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sources', ?)", (json.dumps(sources(screen), sort_keys=True),))
+
+
+def name_ids(conn, table, names):
+    conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in set(names) if name])
+    ids = {}
+    for name, name_id in conn.execute(f"SELECT name, id FROM {table}"):
+        ids[name] = name_id
+    return ids
+
+
+def iso_day(value, cache):
+    day = parse_day(value, cache)
+    return date.fromordinal(day).isoformat() if day is not None else None
+
+
+def number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def insert_stocks(conn, screen, rows, start):
+    # rows are [date, stock, *extra columns] as in the CSV.
+    columns = extra_columns(screen)
+    ids = name_ids(conn, "stocks", [row[1] for row in rows if len(row) > 1])
+    cache = {}
+    conn.executemany(
+        f"INSERT INTO appearances (seq, date, stock_id{''.join(', ' + column for column in columns)}) "
+        f"VALUES (?, ?, ?{', ?' * len(columns)})",
+        (
+            [start + index, iso_day(row[0], cache), ids.get(row[1]) if len(row) > 1 else None]
+            + [number(row[2 + i]) if len(row) > 2 + i else None for i in range(len(columns))]
+            for index, row in enumerate(rows)
+        ),
+    )
+
+
+def insert_industries(conn, rows, start):
+    # rows are [date, industry, count] as in the CSV.
+    ids = name_ids(conn, "industries", [row[1] for row in rows if len(row) > 1])
+    cache = {}
+    conn.executemany(
+        "INSERT INTO industry_counts (seq, date, industry_id, count) VALUES (?, ?, ?, ?)",
+        (
+            (start + index, iso_day(row[0], cache), ids.get(row[1]) if len(row) > 1 else None, int(row[2] or 0) if len(row) > 2 else 0)
+            for index, row in enumerate(rows)
+        ),
+    )
+
+
+def refresh_days(conn, dates=None):
+    # Per-day totals for `dates` (all when None).
+    if dates is None:
+        conn.execute("DELETE FROM days")
+        where, params = "IS NOT NULL", ()
+    else:
+        dates = sorted(dates)
+        conn.executemany("DELETE FROM days WHERE date = ?", [(day,) for day in dates])
+        where, params = f"IN ({', '.join('?' * len(dates))})", dates
+    conn.execute(f"""
+        INSERT INTO days (date, stocks, industries)
+        SELECT date, SUM(stocks), SUM(industries) FROM (
+            SELECT date, COUNT(stock_id) AS stocks, 0 AS industries FROM appearances WHERE date {where} GROUP BY date
+            UNION ALL
+            SELECT date, 0, COUNT(industry_id) FROM industry_counts WHERE date {where} GROUP BY date
+        ) GROUP BY date
+    """, params + params)
+
+
+def read_csv_rows(path):
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row for row in reader if row]
+
+
+def import_csvs(screen):
+    # Rebuilds the screen's database from its CSVs in one transaction.
+    conn = connect(screen, create=True)
+    try:
+        with conn:
+            for table in ("appearances", "industry_counts", "days", "stocks", "industries"):
+                conn.execute(f"DELETE FROM {table}")
+            stock_rows = read_csv_rows(screen["stocks_file"])
+            industry_rows = read_csv_rows(screen["industry_file"])
+            insert_stocks(conn, screen, stock_rows, 0)
+            insert_industries(conn, industry_rows, 0)
+            refresh_days(conn)
+            mark_synced(conn, screen)
+        return len(stock_rows), len(industry_rows)
+    finally:
+        conn.close()
+
+
+def open_synced(screen):
+    # The screen's database if it exists and matches the CSVs, else None
+    # (with a hint when it exists but has fallen behind).
+    conn = connect(screen)
+    if conn is None:
+        return None
+    if in_sync(conn, screen):
+        return conn
+    conn.close()
+    print(f"Warning: {screen['db_file']} is out of date with the CSVs; run python sqlite_store.py --import")
+    return None
+
+
+def append_day(conn, screen, day, stock_rows, industry_rows, replace=False):
+    # Mirrors one scrape's CSV writes: each dataset's rows go in (replacing
+    # that day's old ones with `replace`) and the sync marker moves to the
+    # new CSV state, all in a single transaction.
+    with conn:
+        if stock_rows:
+            if replace:
+                conn.execute("DELETE FROM appearances WHERE date = ?", (day,))
+            start = conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM appearances").fetchone()[0]
+            insert_stocks(conn, screen, stock_rows, start)
+        if industry_rows:
+            if replace:
+                conn.execute("DELETE FROM industry_counts WHERE date = ?", (day,))
+            start = conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM industry_counts").fetchone()[0]
+            insert_industries(conn, industry_rows, start)
+        refresh_days(conn, [day])
+        mark_synced(conn, screen)
+
+
+def load_days(conn, dataset):
+    # The same {day ordinal: {name: [count, first seq]}} buckets (and row
+    # count) that aggregate.bucket_rows builds from the CSV.
+    if dataset == "stocks":
+        query = """
+            SELECT a.date, s.name, COUNT(*), MIN(a.seq)
+            FROM appearances a JOIN stocks s ON s.id = a.stock_id
+            GROUP BY a.date, a.stock_id
+        """
+        total = "SELECT COUNT(*) FROM appearances"
+    else:
+        query = """
+            SELECT c.date, i.name, SUM(c.count), MIN(c.seq)
+            FROM industry_counts c JOIN industries i ON i.id = c.industry_id
+            GROUP BY c.date, c.industry_id
+        """
+        total = "SELECT COUNT(*) FROM industry_counts"
+    days = {}
+    cache = {}
+    for value, name, count, first in conn.execute(query):
+        days.setdefault(parse_day(value, cache), {})[name] = [count, first]
+    return days, conn.execute(total).fetchone()[0]
+
+
+def window_counts(conn, dataset, today):
+    # {timeframe: [(name, count, first seq, last day ordinal)]} in ranking
+    # order (count, then first appearance), each window a GROUP BY over the
+    # date index instead of a Python fold.
+    if dataset == "stocks":
+        select = """
+            SELECT s.name, COUNT(*) AS total, MIN(a.seq) AS first, MAX(a.date)
+            FROM appearances a JOIN stocks s ON s.id = a.stock_id
+            {where} GROUP BY a.stock_id ORDER BY total DESC, first
+        """
+        column = "a.date"
+    else:
+        select = """
+            SELECT i.name, SUM(c.count) AS total, MIN(c.seq) AS first, MAX(c.date)
+            FROM industry_counts c JOIN industries i ON i.id = c.industry_id
+            {where} GROUP BY c.industry_id ORDER BY total DESC, first
+        """
+        column = "c.date"
+    starts = dict(window_starts(today))
+    end = today.isoformat()
+    cache = {}
+    windows = {}
+    for key, _ in TIMEFRAMES:
+        if key in starts:
+            query = select.format(where=f"WHERE {column} BETWEEN ? AND ?")
+            params = (date.fromordinal(starts[key]).isoformat(), end)
+        else:
+            query, params = select.format(where=""), ()
+        windows[key] = [(name, total, first, parse_day(last, cache)) for name, total, first, last in conn.execute(query, params)]
+    return windows
+
+
+def main():
+    from screens import select_screens
+
+    parser = argparse.ArgumentParser(description="Optional SQLite copy of each screen's history (data/history.sqlite)")
+    parser.add_argument("--screen", action="append", help="only this registered screen (repeatable; default: all)")
+    parser.add_argument("--import", dest="import_csvs", action="store_true", help="(re)build the database from the CSVs")
+    parser.add_argument("--report", choices=sorted(REPORTS), help="print one of the ready-made queries")
+    parser.add_argument("--since", default="0000-00-00", help="only rows on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+    try:
+        screens = select_screens(args.screen)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.import_csvs and not args.report:
+        parser.error("nothing to do: pass --import and/or --report")
+
+    for screen in screens:
+        if args.import_csvs:
+            stocks, industries = import_csvs(screen)
+            print(f"Imported {stocks} stock rows and {industries} industry rows into {screen['db_file']}")
+        if args.report:
+            conn = connect(screen)
+            if conn is None:
+                parser.error(f"{screen['db_file']} does not exist; run with --import first")
+            try:
+                writer = csv.writer(sys.stdout)
+                for row in conn.execute(REPORTS[args.report], {"since": args.since, "limit": args.limit}):
+                    writer.writerow(row)
+            finally:
+                conn.close()
+
+
+if __name__ == "__main__":
+    main()
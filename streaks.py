@@ -0,0 +1,124 @@
+from datetime import date
+
+from aggregate import format_day
+from trading_calendar import calendar_digest, session_number
+
+# Momentum compares appearances in the last N sessions with the N before.
+MOMENTUM_SESSIONS = 5
+RECENT_MASK = (1 << (2 * MOMENTUM_SESSIONS)) - 1
+LOW_MASK = (1 << MOMENTUM_SESSIONS) - 1
+
+
+class StockState:
+    # One per stock, touched only on sessions the stock appears in. Sessions
+    # are trading_calendar.session_number values, so a trading day the
+    # scraper missed still breaks a streak. `recent` is a bitmask of the last
+    # 2 * MOMENTUM_SESSIONS sessions as of `last_session`, bit 0 being that
+    # session.
+    __slots__ = ("first_day", "last_session", "streak", "best_streak", "recent")
+
+    def __init__(self, first_day, session):
+        self.first_day = first_day
+        self.last_session = session
+        self.streak = 1
+        self.best_streak = 1
+        self.recent = 1
+
+    def appear(self, session):
+        gap = session - self.last_session
+        if gap <= 0:
+            return
+        self.streak = self.streak + 1 if gap == 1 else 1
+        if self.streak > self.best_streak:
+            self.best_streak = self.streak
+        self.recent = ((self.recent << gap) | 1) & RECENT_MASK if gap < 2 * MOMENTUM_SESSIONS else 1
+        self.last_session = session
+
+    def stats(self, session):
+        # (current streak, best streak, appearances in the last N sessions,
+        # in the N before) as of `session`.
+        gap = session - self.last_session
+        bits = (self.recent << gap) & RECENT_MASK if gap < 2 * MOMENTUM_SESSIONS else 0
+        return (
+            self.streak if gap == 0 else 0,
+            self.best_streak,
+            bin(bits & LOW_MASK).count("1"),
+            bin(bits >> MOMENTUM_SESSIONS).count("1"),
+        )
+
+    def encode(self):
+        return [self.first_day, self.last_session, self.streak, self.best_streak, self.recent]
+
+    @classmethod
+    def decode(cls, values):
+        state = cls.__new__(cls)
+        state.first_day, state.last_session, state.streak, state.best_streak, state.recent = values
+        return state
+
+
+def appearances(days, sessions):
+    # Snapshot day buckets know each day's size without reading its segment.
+    sizes = getattr(days, "sizes", None)
+    if sizes is not None:
+        return sum(sizes[day] for day in sessions)
+    return sum(len(days[day]) for day in sessions)
+
+
+def update_states(encoded, days, base=None):
+    # Brings the stored states up to date with `days` (the stock day buckets)
+    # by replaying only days after the last one processed. `base` is the day
+    # snapshot's snapshot.update_days base: when the snapshot was rebuilt
+    # (a --replace, dedupe or edit), or the holiday calendar or the stored
+    # day/appearance totals no longer match, everything is replayed. The
+    # last processed day is always replayed, since a later scrape of the
+    # same session may have added names to it; appearing twice in one
+    # session is a no-op, so that is safe.
+    # Returns (states, session number of the latest day, encoded).
+    data_days = sorted(day for day in days if day is not None)
+    encoded = encoded or {}
+    done = encoded.get("sessions", 0)
+    last_day = encoded.get("last_day")
+    processed = [day for day in data_days if last_day is not None and day <= last_day]
+    if (
+        base is not None
+        and encoded.get("base") == base
+        and encoded.get("calendar") == calendar_digest()
+        and len(processed) == done
+        and appearances(days, processed[:-1]) == encoded.get("appearances")
+    ):
+        states = {name: StockState.decode(values) for name, values in encoded.get("stocks", {}).items()}
+        done = max(done - 1, 0)
+    else:
+        states, done = {}, 0
+    for day in data_days[done:]:
+        session = session_number(date.fromordinal(day))
+        for name in days[day]:
+            state = states.get(name)
+            if state is None:
+                states[name] = StockState(day, session)
+            else:
+                state.appear(session)
+    encoded = {
+        "base": base,
+        "calendar": calendar_digest(),
+        "sessions": len(data_days),
+        "last_day": data_days[-1] if data_days else None,
+        "appearances": appearances(days, data_days[:-1]),
+        "stocks": {name: state.encode() for name, state in states.items()},
+    }
+    return states, session_number(date.fromordinal(data_days[-1])) if data_days else -1, encoded
+
+
+def stock_stats(states, session):
+    # {stock: {"first_seen", "streak", "best_streak", "recent", "prior"}}
+    result = {}
+    for name, state in states.items():
+        streak, best, recent, prior = state.stats(session)
+        result[name] = {
+            "first_seen": format_day(state.first_day),
+            "streak": streak,
+            "best_streak": best,
+            "recent": recent,
+            "prior": prior,
+        }
+    return result
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from atomic import atomic_write, write_atomic
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    write_atomic(path, b"old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write("half")
+            raise RuntimeError("interrupted")
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["state.json"]
@@ -0,0 +1,94 @@
+import io
+import math
+import mmap
+from datetime import date
+
+from columnar import bucket_tables, export_csv, export_partitions, read_partitions
+from snapshot import stream_rows
+from aggregate import bucket_rows
+
+ROWS = [
+    "date,stock",
+    "2026-09-29,Alpha",
+    "2026-09-30,Beta",
+    "2026-10-01,Alpha",
+    "2026-09-30,Gamma",
+    ",Undated",
+    "2026-10-02,Beta",
+]
+
+
+def write_csv(path, lines):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("\r\n".join(lines) + "\r\n")
+
+
+def exported(tmp_path, lines, compress=False):
+    csv_path = str(tmp_path / "stocks.csv")
+    write_csv(csv_path, lines)
+    directory = str(tmp_path / "store")
+    months = export_partitions(csv_path, directory, "stock", compress=compress)
+    return csv_path, directory, months
+
+
+def test_uncompressed_partitions_are_mapped(tmp_path):
+    _, directory, months = exported(tmp_path, ROWS)
+    assert months == ["2026-09", "2026-10", "undated"]
+    tables = read_partitions(directory, use_numpy=False)
+    assert all(isinstance(table.dates, memoryview) and isinstance(table.dates.obj, mmap.mmap) for table in tables)
+    assert [table.rows for table in tables] == [3, 2, 1]
+
+
+def test_round_trip(tmp_path):
+    for compress in (False, True):
+        csv_path, directory, _ = exported(tmp_path, ROWS, compress)
+        out = io.StringIO(newline="")
+        export_csv(read_partitions(directory, use_numpy=False), out, "stock")
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            assert out.getvalue() == f.read()
+
+
+def test_buckets_match_csv(tmp_path):
+    csv_path, directory, _ = exported(tmp_path, ROWS)
+    with open(csv_path, "rb") as f:
+        expected, _ = bucket_rows(stream_rows(f, None, [0]), "stock")
+    for use_numpy in (False, True):
+        days, rows = bucket_tables(read_partitions(directory, use_numpy=use_numpy))
+        assert rows == 6
+        assert days == expected
+
+
+def test_date_range_and_append(tmp_path):
+    csv_path, directory, _ = exported(tmp_path, ROWS)
+    write_csv(csv_path, ROWS + ["2026-10-05,Gamma"])
+    assert export_partitions(csv_path, directory, "stock") == ["2026-10"]
+    tables = read_partitions(directory, date(2026, 9, 30), date(2026, 10, 1), use_numpy=False)
+    assert [(list(table.dates), list(table.positions)) for table in tables] == [
+        ([date(2026, 9, 30).toordinal()] * 2, [1, 3]),
+        ([date(2026, 10, 1).toordinal()], [2]),
+    ]
+
+
+def test_extra_columns_are_typed(tmp_path):
+    # Rows from before the CSV gained the screen's columns read back as NaN.
+    lines = ["date,stock,price,change_pct,market_cap"] + ROWS[1:3] + ["2026-10-01,Alpha,1234.50,5.2,98765", "2026-10-01,Beta,,,"]
+    csv_path = str(tmp_path / "stocks.csv")
+    write_csv(csv_path, lines)
+    directory = str(tmp_path / "store")
+    extra_fields = ["price", "change_pct", "market_cap"]
+    for compress in (False, True):
+        export_partitions(csv_path, directory, "stock", full=True, compress=compress, extra_fields=extra_fields)
+        for use_numpy in (False, True):
+            tables = read_partitions(directory, use_numpy=use_numpy)
+            assert list(tables[-1].extras) == extra_fields
+            assert list(tables[-1].extras["price"])[0] == 1234.5
+            assert all(math.isnan(value) for value in list(tables[0].extras["market_cap"]) + [tables[-1].extras["price"][1]])
+        out = io.StringIO(newline="")
+        export_csv(read_partitions(directory, use_numpy=False), out, "stock")
+        assert out.getvalue().splitlines() == [
+            "date,stock,price,change_pct,market_cap",
+            "2026-09-29,Alpha,,,",
+            "2026-09-30,Beta,,,",
+            "2026-10-01,Alpha,1234.5,5.2,98765",
+            "2026-10-01,Beta,,,",
+        ]
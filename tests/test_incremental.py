@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from aggregate import bucket_rows, update_outer, window_entries
+from snapshot import load_snapshot, save_snapshot, update_days
+
+
+def history(first, last):
+    day = first
+    while day <= last:
+        if day.weekday() < 5:
+            for i in range(day.toordinal() % 5 + 1):
+                yield {"date": day.isoformat(), "stock": f"S{(day.toordinal() * 7 + i) % 40}"}
+        day += timedelta(days=1)
+
+
+def test_carried_outer_totals_match_a_full_fold():
+    # New rows are only ever dated after the previous build, as when the
+    # snapshot keeps its outer totals.
+    today = date(2025, 10, 15)
+    rows = list(history(date(2023, 1, 2), today)) + [{"date": "", "stock": "Undated"}]
+    days, count = bucket_rows(rows, "stock")
+    outer = update_outer(days, today, None)
+    for _ in range(6):
+        later = today + timedelta(days=7)
+        days, count = bucket_rows(history(today + timedelta(days=1), later), "stock", days=days, start=count)
+        outer = update_outer(days, later, outer)
+        assert window_entries(days, later, outer) == window_entries(days, later)
+        today = later
+
+
+def write_csv(path, rows):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.writelines(f"{row['date']},{row['stock']}\r\n" for row in rows)
+
+
+def test_snapshot_reads_only_touched_months(tmp_path):
+    csv_path = str(tmp_path / "stocks.csv")
+    state_path = str(tmp_path / "state.json")
+    write_csv(csv_path, [{"date": "date", "stock": "stock"}])
+    write_csv(csv_path, history(date(2026, 1, 5), date(2026, 6, 30)))
+    datasets = {}
+    full, _ = update_days(datasets, "stocks", csv_path, "stock")
+    expected = {day: dict(full[day]) for day in full}
+    save_snapshot(datasets, state_path)
+
+    datasets = load_snapshot(state_path)
+    write_csv(csv_path, [{"date": "2026-07-01", "stock": "New"}])
+    days, _ = update_days(datasets, "stocks", csv_path, "stock")
+    assert set(days.months) == {"2026-07"}
+    assert days.dirty == {"2026-07"}
+    assert {day: days[day] for day in expected} == expected
@@ -0,0 +1,125 @@
+import os
+
+import pytest
+import requests
+
+import scrape
+from http_scrape import FallbackRequired, fetch_page, fetch_screen, parse_screen_html
+from replay import FixtureStore, replay_session
+from screens import DEFAULT_SCREEN
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "screener")
+SCREEN_URL = DEFAULT_SCREEN["url"]
+HEADERS = [
+    "S.No.", "Name", "CMP Rs.", "P/E", "Mar Cap Rs.Cr.", "Div Yld %",
+    "NP Qtr Rs.Cr.", "Qtr Profit Var %", "Sales Qtr Rs.Cr.", "Chg %",
+]
+LABELS = [
+    "Automobile and Ancillaries - 2", "Capital Goods - 10", "Chemicals - 4", "Construction - 7", "FMCG - 10",
+    "Finance - 8", "IT - Software - 8", "Metals & Mining - 1", "Pharmaceuticals - 6", "Textiles & Apparels - 4",
+]
+# (url suffix, row count, first row, last row name)
+PAGES = [
+    ("", 25, ["1.", "Natl. Aluminium", "1,873.10", "83.49", "276,890.39", "0.75", "120.78", "220.74", "745.88", "8.80"], "Hindustan Copper"),
+    ("?page=2", 25, ["26.", "Mayur Uniquoters", "3,059.45", "32.71", "673,137.20", "2.50", "7.86", "206.37", "8080.36", "14.60"], "Premier Polyfilm"),
+    ("?page=3", 10, ["51.", "D-Link India", "637.90", "80.89", "200,745.84", "1.79", "676.10", "199.44", "4452.77", "8.55"], "Motil.Oswal.Fin."),
+]
+
+
+@pytest.fixture(scope="module")
+def store():
+    return FixtureStore(FIXTURES)
+
+
+def load_page(store, suffix):
+    return parse_screen_html(store.load(SCREEN_URL + suffix).decode("utf-8"))
+
+
+@pytest.mark.parametrize("suffix,count,first,last", PAGES)
+def test_screen_page(store, suffix, count, first, last):
+    page = load_page(store, suffix)
+    assert page["has_table"]
+    assert not page["login_wall"]
+    assert page["page_count"] == 3
+    assert page["paged"]
+    assert page["result_count"] == 60
+    assert page["table"]["headers"] == HEADERS
+    rows = page["table"]["rows"]
+    assert len(rows) == count
+    assert rows[0]["name"] == first[1]
+    assert rows[0]["cells"] == first
+    assert rows[-1]["name"] == last
+
+
+def test_stock_rows(store):
+    rows = scrape.parse_stock_table(load_page(store, "")["table"])
+    assert len(rows) == 25
+    # date, name, price, change_pct, market_cap with the thousands separators
+    # and percent signs stripped.
+    assert rows[0] == [scrape.TODAY, "Natl. Aluminium", "1873.10", "8.80", "276890.39"]
+    assert rows[1] == [scrape.TODAY, "Krishna Defence", "1990.56", "9.47", "362858.76"]
+
+
+def test_stock_rows_every_page(store):
+    names = []
+    for suffix, count, first, _ in PAGES:
+        rows = scrape.parse_stock_table(load_page(store, suffix)["table"])
+        assert len(rows) == count
+        assert rows[0][1:] == [first[1], first[2].replace(",", ""), first[9], first[4].replace(",", "")]
+        names.extend(row[1] for row in rows)
+    assert len(set(names)) == 60
+
+
+def test_industry_labels(store):
+    page = load_page(store, "")
+    assert page["labels"] == LABELS
+    rows = scrape.parse_industry_labels(page["labels"])
+    assert [row[1:] for row in rows] == [[label.rsplit(" - ", 1)[0], int(label.rsplit(" - ", 1)[1])] for label in LABELS]
+    assert rows[6] == [scrape.TODAY, "IT - Software", 8]
+    assert sum(row[2] for row in rows) == 60
+
+
+def replayed(tmp_path, body):
+    fixtures = FixtureStore(str(tmp_path))
+    fixtures.save(SCREEN_URL, body.encode("utf-8"))
+    return replay_session(requests.Session(), fixtures)
+
+
+def test_login_wall(tmp_path):
+    body = '<html><body><form action="/login/" method="post"><input name="username"></form></body></html>'
+    page = parse_screen_html(body)
+    assert page["login_wall"]
+    with pytest.raises(FallbackRequired, match="login wall"):
+        fetch_page(replayed(tmp_path, body), SCREEN_URL)
+
+
+def test_no_table(tmp_path):
+    body = "<html><body><p>Something went wrong</p></body></html>"
+    page = parse_screen_html(body)
+    assert not page["has_table"]
+    assert page["table"]["rows"] == []
+    with pytest.raises(FallbackRequired, match="no results table"):
+        fetch_page(replayed(tmp_path, body), SCREEN_URL)
+
+
+def test_unsized_screen(tmp_path):
+    # No page links, no "page X of Y" and no result count: page 1 alone
+    # can't be trusted to be the whole screen.
+    body = (
+        '<html><body><div role="menu"><label><input type="checkbox">IT - Software - 3</label></div>'
+        '<table><tr><th>S.No.</th><th>Name</th></tr><tr><td>1.</td><td><a href="/company/X/">X</a></td></tr></table>'
+        '</body></html>'
+    )
+    page = parse_screen_html(body)
+    assert not page["paged"]
+    assert page["page_count"] == 1
+    assert page["result_count"] is None
+    fixtures = FixtureStore(str(tmp_path))
+    fixtures.save(SCREEN_URL, body.encode("utf-8"))
+    with pytest.raises(FallbackRequired, match="no page count"):
+        fetch_screen(SCREEN_URL, 1, prepare_session=lambda session: replay_session(session, fixtures))
+
+
+def test_fixture_page_passes_fetch(store):
+    page = fetch_page(replay_session(requests.Session(), store), SCREEN_URL)
+    assert page["table"]["rows"][0]["url"] == "https://www.screener.in/company/NATLALUMIN/"
@@ -0,0 +1,94 @@
+import hashlib
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# NSE equity segment trading holidays. Add a new year's list here as soon as
+# the exchange publishes it.
+NSE_HOLIDAYS = {
+    2026: {
+        date(2026, 1, 15): "Municipal Corporation Election - Maharashtra",
+        date(2026, 1, 26): "Republic Day",
+        date(2026, 3, 3): "Holi",
+        date(2026, 3, 26): "Shri Ram Navami",
+        date(2026, 3, 31): "Shri Mahavir Jayanti",
+        date(2026, 4, 3): "Good Friday",
+        date(2026, 4, 14): "Dr. Baba Saheb Ambedkar Jayanti",
+        date(2026, 5, 1): "Maharashtra Day",
+        date(2026, 5, 28): "Bakri Id",
+        date(2026, 6, 26): "Muharram",
+        date(2026, 9, 14): "Ganesh Chaturthi",
+        date(2026, 10, 2): "Mahatma Gandhi Jayanti",
+        date(2026, 10, 20): "Dussehra",
+        date(2026, 11, 10): "Diwali-Balipratipada",
+        date(2026, 11, 24): "Prakash Gurpurb Sri Guru Nanak Dev",
+        date(2026, 12, 25): "Christmas",
+    },
+}
+
+
+def holiday_name(day):
+    return NSE_HOLIDAYS.get(day.year, {}).get(day)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and holiday_name(day) is None
+
+
+def closed_reason(day):
+    if day.weekday() >= 5:
+        return "weekend"
+    return holiday_name(day)
+
+
+def market_today():
+    # The exchange's date, whatever the host's timezone or the hour of the run.
+    return datetime.now(IST).date()
+
+
+# Any Monday; session numbers count from here.
+SESSION_EPOCH = date(2000, 1, 3)
+
+
+def session_number(day):
+    # Trading sessions from SESSION_EPOCH up to (not including) `day`. Stable
+    # across runs, so the difference of two days' numbers is the number of
+    # sessions between them whether or not anything was scraped in between.
+    weeks, rest = divmod(day.toordinal() - SESSION_EPOCH.toordinal(), 7)
+    holidays = sum(
+        1 for year in NSE_HOLIDAYS.values() for holiday in year
+        if SESSION_EPOCH <= holiday < day and holiday.weekday() < 5
+    )
+    return weeks * 5 + min(rest, 5) - holidays
+
+
+def calendar_digest():
+    # Changes whenever a holiday list is added or edited, which renumbers
+    # the sessions after it.
+    days = sorted(holiday.isoformat() for year in NSE_HOLIDAYS.values() for holiday in year)
+    return hashlib.sha1(",".join(days).encode("ascii")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def session_index(first_year, last_year):
+    # Ordinals of every trading day in the years, ascending; position in this
+    # tuple is the session number. Years without a holiday list count
+    # weekdays only.
+    day = date(first_year, 1, 1)
+    end = date(last_year, 12, 31)
+    sessions = []
+    while day <= end:
+        if is_trading_day(day):
+            sessions.append(day.toordinal())
+        day += timedelta(days=1)
+    return tuple(sessions)
+
+
+def last_sessions_start(day, count):
+    # First day of the `count` most recent sessions up to and including `day`.
+    years = count // 240 + 2
+    sessions = session_index(day.year - years, day.year)
+    position = bisect_right(sessions, day.toordinal())
+    return date.fromordinal(sessions[max(0, position - count)])